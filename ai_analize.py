@@ -0,0 +1,307 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+AI_MODELIS = "gpt-4o-mini"
+AI_TEMPERATURA = 0.4
+SISTEMOS_ZINUTE = "Tu esi patyręs verslo ir procesų analitikas."
+
+# AI atsakymų podėlis diske: kelias, galiojimo laikas ir didžiausias įrašų skaičius
+AI_PODELIO_KELIAS = os.environ.get("KLAIDU_AI_PODELIS", ".ai_podelis.sqlite3")
+AI_PODELIO_TTL_S = int(os.environ.get("KLAIDU_AI_PODELIO_TTL_S", str(7 * 24 * 3600)))
+AI_PODELIO_DYDIS = int(os.environ.get("KLAIDU_AI_PODELIO_DYDIS", "500"))
+
+# Vienos užklausos laiko limitas (s) ir kiek kartų bandoma, kol gaunamas pirmas tekstas
+AI_LAIKO_LIMITAS_S = float(os.environ.get("KLAIDU_AI_LAIKO_LIMITAS_S", "60"))
+AI_BANDYMAI = int(os.environ.get("KLAIDU_AI_BANDYMAI", "3"))
+
+# Užklausos dydžio biudžetas (žetonais) ir kiek didžiausių eilučių rodoma kiekvienoje lentelėje
+AI_ZETONU_BIUDZETAS = int(os.environ.get("KLAIDU_AI_ZETONU_BIUDZETAS", "6000"))
+AI_TOP_N = int(os.environ.get("KLAIDU_AI_TOP_N", "20"))
+
+
+def estimate_tokens(text):
+    # Apytikslis žetonų skaičius: ~4 UTF-8 baitai vienam žetonui
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def compact_table(df, label_col, top_n, other_label):
+    # Palieka top_n eilučių, likusios sujungiamos į vieną "kiti" eilutę
+    if len(df) <= top_n:
+        return df
+    top = df.head(top_n)
+    rest = df.iloc[top_n:]
+    other = {label_col: f"{other_label} ({len(rest)})"}
+    for col in ("Dokumentų_skaičius", "Klaidų skaičius"):
+        if col in df.columns:
+            other[col] = rest[col].sum()
+    if "Klaidų_procentas" in df.columns and other.get("Dokumentų_skaičius"):
+        other["Klaidų_procentas"] = round(other["Klaidų skaičius"] / other["Dokumentų_skaičius"] * 100, 2)
+    return pd.concat([top, pd.DataFrame([other])], ignore_index=True)
+
+
+def table_markdown(df, empty_text):
+    return df.to_markdown(index=False) if not df.empty else empty_text
+
+
+def pareto_summary(pareto):
+    if pareto.empty:
+        return "Nėra klaidų."
+    klaidu_viso = int(pareto["Klaidų skaičius"].sum())
+    su_klaidomis = int((pareto["Klaidų skaičius"] > 0).sum())
+    # Kiek siuntėjų (nuo daugiausiai klaidų turinčių) sudaro 80 % visų klaidų
+    iki_80 = int((pareto["Kumuliacinis %"] < 80).sum()) + 1
+    iki_80 = min(iki_80, len(pareto))
+    top_dalis = pareto["Klaidų skaičius"].head(5).sum() / klaidu_viso * 100 if klaidu_viso else 0.0
+    return (
+        f"- Siuntėjų su klaidomis: {su_klaidomis} iš {len(pareto)}\n"
+        f"- 80 % klaidų sudaro {iki_80} siuntėjai(-ų) "
+        f"({iki_80 / len(pareto) * 100:.1f} % visų siuntėjų)\n"
+        f"- 5 daugiausiai klaidų turintys siuntėjai sudaro {top_dalis:.1f} % klaidų"
+    )
+
+
+def build_prompt(rezultatai, top_n=AI_TOP_N, token_budget=AI_ZETONU_BIUDZETAS):
+    # Lentelės sutraukiamos iki top_n eilučių; jei užklausa vis tiek viršija
+    # biudžetą, top_n mažinamas perpus
+    while True:
+        prompt = compose_prompt(rezultatai, top_n)
+        if estimate_tokens(prompt) <= token_budget or top_n <= 1:
+            return prompt
+        top_n //= 2
+
+
+def compose_prompt(rezultatai, top_n):
+    summary = rezultatai["summary"]
+    priezastys = compact_table(rezultatai["priezastys"], "Klaidos priežastis", top_n, "Kitos priežastys")
+    siuntejai_stats = compact_table(rezultatai["siuntejai_stats"], "Siuntėjas", top_n, "Kiti siuntėjai")
+    siuntejai_proc = compact_table(rezultatai["siuntejai_proc"], "Siuntėjas", top_n, "Kiti siuntėjai")
+    uzsakovai_stats = compact_table(rezultatai["uzsakovai_stats"], "Užsakovas", top_n, "Kiti užsakovai")
+
+    summary_md = table_markdown(summary, "Nėra duomenų.")
+    priezastys_md = table_markdown(priezastys, "Nėra klaidų.")
+    siuntejai_md = table_markdown(siuntejai_stats, "Nėra duomenų.")
+    siuntejai_proc_md = table_markdown(siuntejai_proc, "Nėra duomenų.")
+    uzsakovai_md = table_markdown(uzsakovai_stats, "Nėra duomenų.")
+    pareto_md = pareto_summary(rezultatai["pareto"])
+
+    return f"""
+Analizuok pateiktus duomenis apie sąskaitų skaičių, klaidų procentą, klaidų priežastis, siuntėjus ir užsakovus.
+
+Svarbu:
+- Atskirai įvertink absoliutų klaidų kiekį ir klaidų procentą.
+- Nevertink vien tik pagal klaidų kiekį, nes kai kurie siuntėjai gali siųsti daugiau dokumentų.
+- Pabrėžk, kur problema yra apimtyje, o kur – kokybėje.
+- Lentelėse pateikti tik didžiausi įrašai, o likusieji sujungti į eilutę "Kiti".
+
+Prašau:
+1. Įvertinti mėnesines tendencijas
+2. Nustatyti, kur koncentruojasi daugiausia klaidų
+3. Įvertinti, kurie siuntėjai siunčia daugiausia klaidų absoliučiai
+4. Įvertinti, kurie siuntėjai turi didžiausią klaidų procentą
+5. Įvertinti, ar matomas Pareto principas
+6. Išskirti didžiausią problemą procese
+7. Pateikti aiškias rekomendacijas, kaip sumažinti klaidas
+8. Pabrėžti, ar problema labiau susijusi su šaltiniu, procesu ar duomenų kokybe
+
+Mėnesių suvestinė:
+{summary_md}
+
+Klaidos pagal priežastį (top {top_n}):
+{priezastys_md}
+
+Siuntėjų analizė pagal klaidų skaičių (top {top_n}):
+{siuntejai_md}
+
+Siuntėjai pagal klaidų procentą, bent 3 dokumentai (top {top_n}):
+{siuntejai_proc_md}
+
+Užsakovų analizė (top {top_n}):
+{uzsakovai_md}
+
+Pareto santrauka:
+{pareto_md}
+"""
+
+
+def analysis_key(prompt, model, temperature):
+    digest = hashlib.sha256()
+    for part in (model, repr(float(temperature)), SISTEMOS_ZINUTE, prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    # SQLite podėlis: pasenę įrašai ištrinami pagal TTL, o viršijus dydį
+    # išmetami seniausiai naudoti. Kiekvienai operacijai atskiras ryšys,
+    # todėl podėlį saugu naudoti iš kelių sesijų vienu metu.
+    def __init__(self, path=AI_PODELIO_KELIAS, ttl_seconds=AI_PODELIO_TTL_S, max_entries=AI_PODELIO_DYDIS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS atsakymai ("
+                "raktas TEXT PRIMARY KEY, atsakymas TEXT NOT NULL, "
+                "sukurta REAL NOT NULL, naudota REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM atsakymai WHERE sukurta < ?", (now - self.ttl_seconds,))
+            row = conn.execute("SELECT atsakymas FROM atsakymai WHERE raktas = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE atsakymai SET naudota = ? WHERE raktas = ?", (now, key))
+            return row[0]
+
+    def put(self, key, response):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO atsakymai (raktas, atsakymas, sukurta, naudota) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            conn.execute(
+                "DELETE FROM atsakymai WHERE raktas NOT IN "
+                "(SELECT raktas FROM atsakymai ORDER BY naudota DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+
+
+class StubClient:
+    # Vietinis klientas testams ir darbui be API rakto: grąžina fiksuotą atsakymą
+    # srautu po žodį ir skaičiuoja užklausas, API nekviečiamas
+    def __init__(self, response="Bandomoji AI analizė.", delay=0.0):
+        self.response = response
+        self.delay = delay
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, temperature, stream=True, **kwargs):
+        self.calls += 1
+        return self._chunks()
+
+    def _chunks(self):
+        for word in self.response.split(" "):
+            time.sleep(self.delay)
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class AnalysisStream:
+    # Užklausa vykdoma foninėje gijoje ir atsakymas gaunamas srautu. Gautos dalys
+    # kaupiamos sąraše, todėl po perkrovimo (rerun) tą patį srautą galima rodyti
+    # iš naujo nuo pradžių. Pilnas atsakymas įrašomas į podėlį.
+    def __init__(self, client, prompt, cache, model=AI_MODELIS, temperature=AI_TEMPERATURA,
+                 timeout=AI_LAIKO_LIMITAS_S, retries=AI_BANDYMAI):
+        self.client = client
+        self.prompt = prompt
+        self.cache = cache
+        self.model = model
+        self.temperature = temperature
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self.key = analysis_key(prompt, model, temperature)
+        self.parts = []
+        self.done = False
+        self.first_token_s = None
+        self._started = time.perf_counter()
+        self.error = None
+        self._cancelled = threading.Event()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="ai-analize", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _finish(self, error=None):
+        with self._cond:
+            self.error = error
+            self.done = True
+            self._cond.notify_all()
+
+    def _stream_once(self):
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SISTEMOS_ZINUTE},
+                {"role": "user", "content": self.prompt}
+            ],
+            temperature=self.temperature,
+            stream=True,
+            timeout=self.timeout
+        )
+        try:
+            for chunk in stream:
+                if self._cancelled.is_set():
+                    return False
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    if self.first_token_s is None:
+                        self.first_token_s = time.perf_counter() - self._started
+                    with self._cond:
+                        self.parts.append(text)
+                        self._cond.notify_all()
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+        return True
+
+    def _run(self):
+        for attempt in range(self.retries):
+            try:
+                if self._stream_once():
+                    self.cache.put(self.key, "".join(self.parts))
+                    self._finish()
+                else:
+                    self._finish(RuntimeError("AI analizė atšaukta."))
+                return
+            except Exception as e:
+                # Kartojama tik tol, kol dar negauta teksto – kitaip atsakymas dubliuotųsi
+                if self.parts or attempt + 1 >= self.retries:
+                    self._finish(e)
+                    return
+                if self._cancelled.wait(min(2 ** attempt, 8)):
+                    self._finish(RuntimeError("AI analizė atšaukta."))
+                    return
+
+    def chunks(self):
+        # Generatorius pagrindinei gijai (pvz., st.write_stream): grąžina naujas dalis,
+        # kai tik jos atkeliauja iš foninės gijos
+        shown = 0
+        limit = self.timeout * (self.retries + 1)
+        while True:
+            with self._cond:
+                ready = self._cond.wait_for(lambda: len(self.parts) > shown or self.done, timeout=limit)
+                if not ready:
+                    self.cancel()
+                    raise TimeoutError(f"AI atsakymas negautas per {limit:.0f} s.")
+                new_parts = self.parts[shown:]
+                done = self.done
+                error = self.error
+            shown += len(new_parts)
+            if new_parts:
+                yield "".join(new_parts)
+            if done:
+                if error is not None:
+                    raise error
+                return
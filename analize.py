@@ -0,0 +1,300 @@
+import numpy as np
+import pandas as pd
+
+from duomenys import month_order
+from paieska import ErrorIndex
+
+
+# ----------------------------
+# PAGALBINĖS FUNKCIJOS
+# ----------------------------
+def category_mask(column, selected):
+    # Pasirinktos kategorijos pažymimos paieškos lentelėje, o eilutės atrenkamos
+    # pagal kategorijų kodus. Kodas -1 (tuščia reikšmė) patenka į paskutinį False.
+    categories = column.cat.categories
+    positions = categories.get_indexer(list(selected))
+    lookup = np.zeros(len(categories) + 1, dtype=bool)
+    lookup[positions[positions >= 0]] = True
+    return lookup[column.cat.codes.to_numpy()]
+
+
+def filter_mask(df, menesiai, siuntejai, uzsakovai, tik_klaidos=False):
+    mask = (
+        category_mask(df["Mėnuo"], menesiai) &
+        category_mask(df["Siuntėjas"], siuntejai) &
+        category_mask(df["Užsakovas"], uzsakovai)
+    )
+    if tik_klaidos:
+        mask &= df["Yra klaida"].to_numpy()
+    return mask
+
+
+def generate_insight(row):
+    klaidos = row["Su_klaidomis"]
+    procentas = row["Klaidų_procentas"]
+    saskaitu = row["Sąskaitų_skaičius"]
+    menuo = row["Mėnuo"]
+
+    if klaidos == 0:
+        return f"✅ {menuo}: jokių klaidų – puikus rezultatas."
+    elif saskaitu < 15 and procentas >= 15:
+        return f"⚠️ {menuo}: nors klaidų tik {klaidos}, jos sudaro {procentas:.2f}% – mažas kiekis padidina procentinę įtaką."
+    elif procentas >= 20:
+        return f"🔴 {menuo}: labai aukštas klaidų procentas ({procentas:.2f}%) – būtina peržiūrėti procesą."
+    elif procentas >= 15:
+        return f"🟠 {menuo}: padidėjęs klaidų procentas ({procentas:.2f}%) – verta ieškoti priežasčių."
+    else:
+        return f"🟢 {menuo}: klaidų lygis ({procentas:.2f}%) yra kontroliuojamas."
+
+
+KUBO_MATAVIMAI = ["Mėnuo", "Siuntėjas", "Užsakovas", "Klaidos_priežastis", "Yra klaida"]
+KLAIDU_SARASO_STULPELIAI = [
+    "Mėnuo",
+    "Užsakovas",
+    "Sąskaitos faktūros Nr.",
+    "Klaidos_priežastis",
+    "Klaidos",
+    "Siuntėjas"
+]
+# Skilčių lentelių grupės ir iš jų gaunamos rezultatų lentelės. Skydelyje grupė
+# skaičiuojama tik atidarius jai reikalingą skiltį, eksportuojant ar kviečiant AI.
+REZULTATU_GRUPES = {
+    "priezastys": ["priezastys"],
+    "siuntejai": ["siuntejai_stats", "siuntejai_proc", "pareto"],
+    "uzsakovai": ["uzsakovai_stats"],
+}
+
+
+def build_cube(df):
+    # ----------------------------
+    # KUBAS: mėnuo × siuntėjas × užsakovas × priežastis × klaida
+    # ----------------------------
+    codes = pd.DataFrame({
+        col: df[col].cat.codes.to_numpy() if col != "Yra klaida" else df[col].to_numpy()
+        for col in KUBO_MATAVIMAI
+    })
+    cell = codes.groupby(KUBO_MATAVIMAI, sort=False).ngroup().to_numpy()
+    invoice, _ = pd.factorize(df["Sąskaitos faktūros Nr."])
+
+    cells = pd.DataFrame({
+        "Langelis": cell,
+        "Dokumentai": invoice >= 0,
+        "Eilutė": np.arange(len(df))
+    }).groupby("Langelis").agg(
+        Dokumentai=("Dokumentai", "sum"),
+        Eilutės=("Eilutė", "size"),
+        Pirma_eilutė=("Eilutė", "min")
+    )
+
+    first = cells["Pirma_eilutė"].to_numpy()
+    for col in KUBO_MATAVIMAI[:-1]:
+        cells[col] = pd.Categorical.from_codes(codes[col].to_numpy()[first], categories=df[col].cat.categories)
+    cells["Yra klaida"] = codes["Yra klaida"].to_numpy()[first]
+    cells["Su_klaidomis"] = np.where(cells["Yra klaida"], cells["Eilutės"], 0)
+
+    # Sąskaitos, esančios tik viename langelyje, suskaičiuojamos iš karto.
+    # Kitoms saugomos (sąskaita, langelis) poros, kad unikalus kiekis būtų tikslus.
+    pairs = pd.DataFrame({"Sąskaita": invoice, "Langelis": cell})[invoice >= 0].drop_duplicates()
+    cells_per_invoice = pairs.groupby("Sąskaita")["Langelis"].transform("size").to_numpy()
+    cells["Unikalios"] = (
+        pairs[cells_per_invoice == 1].groupby("Langelis").size()
+        .reindex(cells.index, fill_value=0)
+    )
+
+    shared = pairs[cells_per_invoice > 1].reset_index(drop=True)
+    shared["Mėnuo"] = cells["Mėnuo"].to_numpy()[shared["Langelis"].to_numpy()]
+
+    klaidos = df.loc[df["Yra klaida"], KLAIDU_SARASO_STULPELIAI]
+
+    return {
+        "langeliai": cells.reset_index(drop=True),
+        "bendros": shared,
+        "klaidos": klaidos,
+        # Paieškos indeksas bendras visiems filtrams: remiasi kategorijų kodais
+        "klaidu_indeksas": ErrorIndex(klaidos)
+    }
+
+
+def entity_stats(selected, col):
+    stats = selected.groupby(col, observed=True).agg(
+        Dokumentų_skaičius=("Dokumentai", "sum"),
+        Klaidų_skaičius=("Su_klaidomis", "sum")
+    ).reset_index().rename(columns={"Klaidų_skaičius": "Klaidų skaičius"})
+    stats[col] = stats[col].astype(str)
+    return stats
+
+
+def aggregate_cube(cube, menesiai, siuntejai, uzsakovai, tik_klaidos=False, grupes=tuple(REZULTATU_GRUPES)):
+    # Suvestinė, klaidų sąrašas ir KPI skaičiuojami visada, skilčių lentelės – tik nurodytoms grupėms
+    cells = cube["langeliai"]
+    mask = filter_mask(cells, menesiai, siuntejai, uzsakovai, tik_klaidos)
+    selected = cells[mask]
+
+    shared = cube["bendros"]
+    shared = shared[mask[shared["Langelis"].to_numpy()]]
+
+    # Mėnesių suvestinė: unikalios sąskaitos = vienkartinės + bendros be pasikartojimų
+    summary = selected.groupby("Mėnuo", observed=True).agg(
+        Sąskaitų_skaičius=("Unikalios", "sum"),
+        Su_klaidomis=("Su_klaidomis", "sum")
+    )
+    summary["Sąskaitų_skaičius"] += (
+        shared.groupby("Mėnuo", observed=True)["Sąskaita"].nunique()
+        .reindex(summary.index, fill_value=0)
+    )
+    summary = summary.reset_index()
+    summary["Mėnuo"] = summary["Mėnuo"].astype(str)
+
+    # Kai filtrai nieko neatmeta, naudojama ta pati kubo lentelė, o ne jos kopija
+    klaidos = cube["klaidos"]
+    klaidu_mask = filter_mask(klaidos, menesiai, siuntejai, uzsakovai)
+    if not klaidu_mask.all():
+        klaidos = klaidos[klaidu_mask]
+
+    agregatai = {
+        "summary": summary,
+        "klaidos": klaidos,
+        "klaidu_indeksas": cube["klaidu_indeksas"],
+        "viso_dokumentu": int(selected["Unikalios"].sum() + shared["Sąskaita"].nunique()),
+        "viso_klaidu": int(selected["Su_klaidomis"].sum())
+    }
+
+    if "priezastys" in grupes:
+        # Priežastys: lygūs kiekiai rikiuojami pagal pirmą pasirodymą, kaip value_counts
+        klaidu_langeliai = selected[selected["Su_klaidomis"] > 0]
+        priezastys = klaidu_langeliai.groupby(
+            klaidu_langeliai["Klaidos_priežastis"].astype(object).fillna("Nenurodyta")
+        ).agg(
+            Kiekis=("Su_klaidomis", "sum"),
+            Pirma=("Pirma_eilutė", "min")
+        ).sort_values(by=["Kiekis", "Pirma"], ascending=[False, True])
+        agregatai["priezastys"] = pd.DataFrame({
+            "Klaidos priežastis": priezastys.index.to_numpy(),
+            "Klaidų skaičius": priezastys["Kiekis"].to_numpy()
+        })
+    if "siuntejai" in grupes:
+        agregatai["siuntejai"] = entity_stats(selected, "Siuntėjas")
+    if "uzsakovai" in grupes:
+        agregatai["uzsakovai"] = entity_stats(selected, "Užsakovas")
+    return agregatai
+
+
+def build_results(agregatai):
+    # ----------------------------
+    # SUVESTINĖ PAGAL MĖNESIUS
+    # ----------------------------
+    summary = agregatai["summary"]
+
+    summary["Klaidų_procentas"] = (
+        summary["Su_klaidomis"] / summary["Sąskaitų_skaičius"] * 100
+    ).round(2)
+
+    summary["Mėnesio_nr"] = summary["Mėnuo"].apply(lambda x: month_order(x, -1))
+    summary = summary.sort_values("Mėnesio_nr").drop(columns="Mėnesio_nr")
+
+    max_skaicius = summary["Sąskaitų_skaičius"].max() if not summary.empty else 1
+    summary["Sąskaitų_procentas"] = (
+        summary["Sąskaitų_skaičius"] / max_skaicius * 100
+    ).round(2)
+
+    if not summary.empty:
+        summary["Įžvalga"] = summary.apply(generate_insight, axis=1)
+
+    # ----------------------------
+    # KLAIDŲ SĄRAŠAS
+    # ----------------------------
+    klaidos = agregatai["klaidos"]
+
+    # ----------------------------
+    # KPI
+    # ----------------------------
+    viso_dokumentu = agregatai["viso_dokumentu"]
+    viso_klaidu = agregatai["viso_klaidu"]
+    klaidu_proc = round((viso_klaidu / viso_dokumentu * 100), 2) if viso_dokumentu else 0.0
+    be_klaidu = viso_dokumentu - viso_klaidu
+
+    # Iš anksto tuščios lentelės eksportui
+    priezastys = pd.DataFrame(columns=["Klaidos priežastis", "Klaidų skaičius"])
+    siuntejai_stats = pd.DataFrame(columns=["Siuntėjas", "Dokumentų_skaičius", "Klaidų skaičius", "Klaidų_procentas"])
+    uzsakovai_stats = pd.DataFrame(columns=["Užsakovas", "Dokumentų_skaičius", "Klaidų skaičius", "Klaidų_procentas"])
+    pareto = pd.DataFrame(columns=["Siuntėjas", "Dokumentų_skaičius", "Klaidų skaičius", "Klaidų_procentas", "Kumuliacinis %"])
+    siuntejai_proc = pd.DataFrame(columns=["Siuntėjas", "Dokumentų_skaičius", "Klaidų skaičius", "Klaidų_procentas"])
+
+    # ----------------------------
+    # ANALIZĖ, JEI YRA KLAIDŲ
+    # ----------------------------
+    # Skaičiuojamos tik tų grupių lentelės, kurių agregatai paskaičiuoti
+    if not klaidos.empty and "priezastys" in agregatai:
+        priezastys = agregatai["priezastys"]
+
+    if not klaidos.empty and "siuntejai" in agregatai:
+        siuntejai_stats = agregatai["siuntejai"]
+        siuntejai_stats["Klaidų_procentas"] = (
+            siuntejai_stats["Klaidų skaičius"] / siuntejai_stats["Dokumentų_skaičius"] * 100
+        ).round(2)
+
+        siuntejai_stats = siuntejai_stats.sort_values(
+            by=["Klaidų skaičius", "Dokumentų_skaičius"],
+            ascending=[False, False]
+        ).reset_index(drop=True)
+
+        # Siuntėjų kokybė: tik siuntėjai su bent 3 dokumentais
+        siuntejai_proc = siuntejai_stats[siuntejai_stats["Dokumentų_skaičius"] >= 3].copy()
+        siuntejai_proc = siuntejai_proc.sort_values(
+            by=["Klaidų_procentas", "Klaidų skaičius"],
+            ascending=[False, False]
+        ).reset_index(drop=True)
+
+        pareto = siuntejai_stats.sort_values(by="Klaidų skaičius", ascending=False).copy()
+        pareto["Kumuliacinis %"] = (
+            pareto["Klaidų skaičius"].cumsum() / pareto["Klaidų skaičius"].sum() * 100
+        ).round(2)
+
+    if not klaidos.empty and "uzsakovai" in agregatai:
+        uzsakovai_stats = agregatai["uzsakovai"]
+        uzsakovai_stats["Klaidų_procentas"] = (
+            uzsakovai_stats["Klaidų skaičius"] / uzsakovai_stats["Dokumentų_skaičius"] * 100
+        ).round(2)
+
+        uzsakovai_stats = uzsakovai_stats.sort_values(
+            by=["Klaidų skaičius", "Dokumentų_skaičius"],
+            ascending=[False, False]
+        ).reset_index(drop=True)
+
+    lenteles = {
+        "priezastys": priezastys,
+        "siuntejai_stats": siuntejai_stats,
+        "uzsakovai_stats": uzsakovai_stats,
+        "siuntejai_proc": siuntejai_proc,
+        "pareto": pareto
+    }
+    return {
+        "summary": summary,
+        "klaidos": klaidos,
+        "klaidu_indeksas": agregatai["klaidu_indeksas"],
+        **{
+            key: lenteles[key]
+            for grupe, keys in REZULTATU_GRUPES.items() if grupe in agregatai
+            for key in keys
+        },
+        "viso_dokumentu": viso_dokumentu,
+        "viso_klaidu": viso_klaidu,
+        "klaidu_proc": klaidu_proc,
+        "be_klaidu": be_klaidu
+    }
+
+
+def default_filters(df):
+    # Numatytoji būsena, kaip skydelyje: pasirinkti visi mėnesiai, siuntėjai ir užsakovai
+    return (
+        df["Mėnuo"].cat.categories.tolist(),
+        df["Siuntėjas"].cat.categories.tolist(),
+        df["Užsakovas"].cat.categories.tolist()
+    )
+
+
+def analyze(df, cube=None):
+    if cube is None:
+        cube = build_cube(df)
+    menesiai, siuntejai, uzsakovai = default_filters(df)
+    return build_results(aggregate_cube(cube, menesiai, siuntejai, uzsakovai))
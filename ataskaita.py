@@ -0,0 +1,94 @@
+import io
+import math
+
+from grafikai import GRAFIKU_DPI, chart_tables, render_png
+
+try:
+    # Greitesnis xlsx rašytuvas, jei įdiegtas
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+
+# Lapas, rezultatų lentelė, grafikas ir jo vieta lape
+ATASKAITOS_LAPAI = [
+    ("Suvestinė", "summary", "menesiai", "I2"),
+    ("Klaidų sąrašas", "klaidos", None, None),
+    ("Priežastys", "priezastys", "priezastys", "D2"),
+    ("Siuntėjai", "siuntejai_stats", "siuntejai_kiekis", "F2"),
+    ("Siuntėjų %", "siuntejai_proc", "siuntejai_proc", "F2"),
+    ("Užsakovai", "uzsakovai_stats", "uzsakovai", "F2"),
+    ("Pareto", "pareto", "pareto", "F2"),
+]
+
+
+def report_rows(df):
+    yield list(df.columns)
+    for row in df.itertuples(index=False, name=None):
+        # NaN/NaT nelygūs sau patiems – rašomi kaip tušti langeliai; begalybės (pvz.,
+        # klaidų procentas užsakovui be dokumentų) Excel nepalaikomos, todėl irgi tuščios
+        yield [None if v != v or (isinstance(v, float) and not math.isfinite(v)) else v for v in row]
+
+
+def safe_add_image(ws, png, anchor, image_scale=1.0):
+    from openpyxl.drawing.image import Image as ExcelImage
+
+    if png is not None:
+        img = ExcelImage(io.BytesIO(png))
+        img.width = int(img.width * image_scale)
+        img.height = int(img.height * image_scale)
+        img.anchor = anchor
+        ws.add_image(img)
+
+
+def write_report_openpyxl(rezultatai, grafikai, image_scale=1.0):
+    # openpyxl įkeliamas tik tada, kai nėra xlsxwriter
+    from openpyxl import Workbook
+
+    # Write-only režimas: eilutės rašomos srautu, langelių objektai atmintyje nelaikomi
+    wb = Workbook(write_only=True)
+
+    for title, key, chart, anchor in ATASKAITOS_LAPAI:
+        ws = wb.create_sheet(title=title)
+        for r in report_rows(rezultatai[key]):
+            ws.append(r)
+        if chart is not None:
+            safe_add_image(ws, grafikai.get(chart), anchor, image_scale)
+
+    excel_buffer = io.BytesIO()
+    wb.save(excel_buffer)
+    return excel_buffer.getvalue()
+
+
+def write_report_xlsxwriter(rezultatai, grafikai, image_scale=1.0):
+    # constant_memory: kiekviena eilutė išrašoma iš karto, kai pereinama prie kitos
+    excel_buffer = io.BytesIO()
+    wb = xlsxwriter.Workbook(excel_buffer, {"constant_memory": True})
+
+    for title, key, chart, anchor in ATASKAITOS_LAPAI:
+        ws = wb.add_worksheet(title)
+        for i, r in enumerate(report_rows(rezultatai[key])):
+            ws.write_row(i, 0, r)
+        png = grafikai.get(chart) if chart is not None else None
+        if png is not None:
+            ws.insert_image(anchor, f"{chart}.png", {
+                "image_data": io.BytesIO(png),
+                "x_scale": image_scale,
+                "y_scale": image_scale
+            })
+
+    wb.close()
+    return excel_buffer.getvalue()
+
+
+def write_report(rezultatai, grafikai, image_scale=1.0):
+    if xlsxwriter is not None:
+        return write_report_xlsxwriter(rezultatai, grafikai, image_scale)
+    return write_report_openpyxl(rezultatai, grafikai, image_scale)
+
+
+def build_report(rezultatai, chart_png=render_png):
+    grafikai = {name: chart_png(name, table) for name, table in chart_tables(rezultatai).items()}
+
+    # Grafikai piešiami didesne raiška, Excel'yje paliekamas įprastas dydis
+    return write_report(rezultatai, grafikai, image_scale=100 / GRAFIKU_DPI)
@@ -0,0 +1,73 @@
+# Ataskaitų generavimas be naršyklės: kiekvienam kataloge esančiam xlsx failui
+# sukuriama Klaidu_Ataskaita.xlsx (su numatytais filtrais, kaip skydelyje).
+# Paleidimas:
+#   python ataskaitu_generatorius.py duomenys/ --isvestis ataskaitos/ --darbuotojai 4
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import as_completed
+
+from analize import analyze
+from ataskaita import build_report
+from duomenys import DARBUOTOJU_SKAICIUS, prepare_data, process_pool, read_workbook
+
+ATASKAITOS_FAILAS = "Klaidu_Ataskaita.xlsx"
+
+
+def find_workbooks(katalogas):
+    # Excel laikinieji failai (~$...) ir jau sugeneruotos ataskaitos praleidžiami
+    return sorted(
+        os.path.join(katalogas, name)
+        for name in os.listdir(katalogas)
+        if name.lower().endswith(".xlsx") and not name.startswith("~$") and name != ATASKAITOS_FAILAS
+    )
+
+
+def generate_report(path, isvestis):
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        df = prepare_data(read_workbook(f.read()))
+
+    data = build_report(analyze(df))
+
+    katalogas = os.path.join(isvestis, os.path.splitext(os.path.basename(path))[0])
+    os.makedirs(katalogas, exist_ok=True)
+    tikslas = os.path.join(katalogas, ATASKAITOS_FAILAS)
+    with open(tikslas, "wb") as f:
+        f.write(data)
+    return tikslas, len(df), time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klaidų ataskaitų generavimas visiems katalogo xlsx failams")
+    parser.add_argument("katalogas", help="katalogas su xlsx failais")
+    parser.add_argument("--isvestis", help="kur rašyti ataskaitas (pagal nutylėjimą – tas pats katalogas)")
+    parser.add_argument("--darbuotojai", type=int, default=DARBUOTOJU_SKAICIUS, help="lygiagrečių procesų skaičius")
+    args = parser.parse_args(argv)
+
+    isvestis = args.isvestis or args.katalogas
+    failai = find_workbooks(args.katalogas)
+    if not failai:
+        print(f"Kataloge {args.katalogas} xlsx failų nerasta.", file=sys.stderr)
+        return 1
+
+    klaidos = 0
+    with process_pool(min(args.darbuotojai, len(failai))) as executor:
+        futures = {executor.submit(generate_report, path, isvestis): path for path in failai}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                tikslas, eilutes, trukme = future.result()
+            except Exception as e:
+                # Vienas sugadintas failas nestabdo kitų
+                klaidos += 1
+                print(f"KLAIDA {path}: {e}", file=sys.stderr)
+                continue
+            print(f"{path} -> {tikslas} ({eilutes} eil., {trukme:.1f} s)")
+
+    return 1 if klaidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
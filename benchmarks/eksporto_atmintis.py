@@ -0,0 +1,98 @@
+# Eksporto atminties palyginimas: kaip keičiasi didžiausias atminties kiekis,
+# kai "Klaidų sąrašas" lapas auga. Paleidimas:
+#   python benchmarks/eksporto_atmintis.py --eilutes 10000 50000 100000 200000
+import argparse
+import gc
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ataskaita  # noqa: E402
+
+
+def synthetic_results(eiluciu_skaicius, seed=0):
+    rng = np.random.default_rng(seed)
+    menesiai = np.array(["Sausis", "Vasaris", "Kovas", "Balandis"])
+    klaidos = pd.DataFrame({
+        "Mėnuo": menesiai[rng.integers(0, len(menesiai), eiluciu_skaicius)],
+        "Užsakovas": [f"Užsakovas {i}" for i in rng.integers(0, 300, eiluciu_skaicius)],
+        "Sąskaitos faktūros Nr.": [f"SF{i:08d}" for i in range(eiluciu_skaicius)],
+        "Klaidos_priežastis": [f"Priežastis {i}" for i in rng.integers(0, 40, eiluciu_skaicius)],
+        "Klaidos": [f"Klaidos aprašymas {i}" for i in rng.integers(0, 5000, eiluciu_skaicius)],
+        "Siuntėjas": [f"siuntejas{i}@imone.lt" for i in rng.integers(0, 200, eiluciu_skaicius)],
+    })
+    stats = pd.DataFrame({
+        "Siuntėjas": [f"siuntejas{i}@imone.lt" for i in range(200)],
+        "Dokumentų_skaičius": rng.integers(1, 1000, 200),
+        "Klaidų skaičius": rng.integers(0, 100, 200),
+        "Klaidų_procentas": rng.random(200).round(2),
+    })
+    return {
+        "summary": pd.DataFrame({"Mėnuo": menesiai, "Sąskaitų_skaičius": [100, 200, 300, 400]}),
+        "klaidos": klaidos,
+        "priezastys": klaidos["Klaidos_priežastis"].value_counts().reset_index(),
+        "siuntejai_stats": stats,
+        "siuntejai_proc": stats,
+        "uzsakovai_stats": stats.rename(columns={"Siuntėjas": "Užsakovas"}),
+        "pareto": stats,
+    }
+
+
+def write_report_regular(rezultatai, grafikai):
+    # Ankstesnis būdas palyginimui: įprastas Workbook laiko visus langelius atmintyje
+    wb = Workbook()
+    wb.remove(wb.active)
+    for title, key, _, _ in ataskaita.ATASKAITOS_LAPAI:
+        ws = wb.create_sheet(title=title)
+        for r in ataskaita.report_rows(rezultatai[key]):
+            ws.append(r)
+    excel_buffer = io.BytesIO()
+    wb.save(excel_buffer)
+    return excel_buffer.getvalue()
+
+
+def measure(writer, rezultatai):
+    # Laikas matuojamas atskirai, nes tracemalloc gerokai sulėtina vykdymą
+    gc.collect()
+    start = time.perf_counter()
+    data = writer(rezultatai, {})
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    writer(rezultatai, {})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eksporto atminties palyginimas")
+    parser.add_argument("--eilutes", type=int, nargs="+", default=[10_000, 50_000, 100_000, 200_000])
+    args = parser.parse_args()
+
+    writers = {
+        "openpyxl (įprastas)": write_report_regular,
+        "openpyxl (write-only)": ataskaita.write_report_openpyxl,
+    }
+    if ataskaita.xlsxwriter is not None:
+        writers["xlsxwriter (constant_memory)"] = ataskaita.write_report_xlsxwriter
+
+    print(f"{'Rašytuvas':<30} {'Eilutės':>9} {'Laikas, s':>10} {'Atmintis, MB':>13} {'Failas, MB':>11}")
+    for eiluciu_skaicius in args.eilutes:
+        rezultatai = synthetic_results(eiluciu_skaicius)
+        for name, writer in writers.items():
+            elapsed, peak, size = measure(writer, rezultatai)
+            print(f"{name:<30} {eiluciu_skaicius:>9} {elapsed:>10.2f} {peak / 1e6:>13.1f} {size / 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
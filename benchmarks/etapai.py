@@ -0,0 +1,134 @@
+# Kiekvieno apdorojimo etapo trukmė sintetiniams failams. Rezultatai rašomi į JSON,
+# kad būtų galima palyginti skirtingas versijas. Paleidimas:
+#   python benchmarks/etapai.py --eilutes 1000 100000 1000000 --isvestis etapai.json
+#   python benchmarks/etapai.py --eilutes 100000 --palyginti senas.json
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ai_analize import build_prompt  # noqa: E402
+from analize import aggregate_cube, build_cube, build_results, default_filters, filter_mask  # noqa: E402
+from ataskaita import write_report  # noqa: E402
+from duomenys import clean_data, encode_categories, read_workbook  # noqa: E402
+from grafikai import GRAFIKU_DPI, VEGA_GRAFIKAI, chart_tables, render_png  # noqa: E402
+from sintetiniai_duomenys import synthetic_workbook  # noqa: E402
+
+
+def timed(func, kartojimai, setup=None):
+    # setup() paruošia argumentą (pvz., kopiją), jo laikas neįskaičiuojamas
+    laikai = []
+    result = None
+    for _ in range(kartojimai):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        result = func(arg) if setup is not None else func()
+        laikai.append(time.perf_counter() - start)
+    return result, {"min_s": min(laikai), "mediana_s": statistics.median(laikai)}
+
+
+def run_stages(data, kartojimai):
+    etapai = {}
+
+    raw, etapai["skaitymas"] = timed(lambda: read_workbook(data), kartojimai)
+    cleaned, etapai["valymas"] = timed(clean_data, kartojimai, setup=raw.copy)
+    df, etapai["kategorijos"] = timed(encode_categories, kartojimai, setup=cleaned.copy)
+    cube, etapai["kubas"] = timed(lambda: build_cube(df), kartojimai)
+
+    # Filtras kaip pakeitus šoninę juostą: pusė siuntėjų, visi mėnesiai ir užsakovai
+    menesiai, siuntejai, uzsakovai = default_filters(df)
+    siuntejai = siuntejai[::2]
+    _, etapai["filtravimas"] = timed(
+        lambda: filter_mask(cube["langeliai"], menesiai, siuntejai, uzsakovai), kartojimai
+    )
+    rezultatai, etapai["agregavimas"] = timed(
+        lambda: build_results(aggregate_cube(cube, menesiai, siuntejai, uzsakovai)), kartojimai
+    )
+
+    lenteles = chart_tables(rezultatai)
+    grafikai, etapai["grafikai"] = timed(
+        lambda: {name: render_png(name, table) for name, table in lenteles.items()}, kartojimai
+    )
+    _, etapai["vega_grafikai"] = timed(
+        lambda: {name: VEGA_GRAFIKAI[name](table) for name, table in lenteles.items()}, kartojimai
+    )
+    _, etapai["eksportas"] = timed(
+        lambda: write_report(rezultatai, grafikai, image_scale=100 / GRAFIKU_DPI), kartojimai
+    )
+    _, etapai["uzklausa"] = timed(lambda: build_prompt(rezultatai), kartojimai)
+    return etapai
+
+
+def git_version():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(rezultatai, senas=None):
+    print(f"{'Eilutės':>9} {'Etapas':<13} {'Min, s':>9} {'Mediana, s':>11} {'Palyginus':>10}")
+    for eiluciu_skaicius, etapai in rezultatai.items():
+        for etapas, laikai in etapai.items():
+            palyginimas = ""
+            if senas is not None:
+                ankstesnis = senas.get(eiluciu_skaicius, {}).get(etapas)
+                if ankstesnis and ankstesnis["min_s"] > 0:
+                    palyginimas = f"{laikai['min_s'] / ankstesnis['min_s']:.2f}x"
+            print(f"{eiluciu_skaicius:>9} {etapas:<13} {laikai['min_s']:>9.4f} {laikai['mediana_s']:>11.4f} {palyginimas:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apdorojimo etapų trukmės matavimas")
+    parser.add_argument("--eilutes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--kartojimai", type=int, default=3)
+    parser.add_argument("--siuntejai", type=int, default=200)
+    parser.add_argument("--uzsakovai", type=int, default=300)
+    parser.add_argument("--klaidu-dalis", type=float, default=0.15)
+    parser.add_argument("--katalogas", default=None, help="kur laikyti sugeneruotus failus tarp paleidimų")
+    parser.add_argument("--isvestis", default="etapai.json")
+    parser.add_argument("--palyginti", default=None, help="ankstesnis JSON rezultatas palyginimui")
+    args = parser.parse_args()
+
+    rezultatai = {}
+    for eiluciu_skaicius in args.eilutes:
+        data = synthetic_workbook(
+            eiluciu_skaicius, args.katalogas,
+            siuntejai=args.siuntejai, uzsakovai=args.uzsakovai, klaidu_dalis=args.klaidu_dalis
+        )
+        rezultatai[str(eiluciu_skaicius)] = run_stages(data, args.kartojimai)
+
+    ataskaita = {
+        "sukurta": datetime.datetime.now().isoformat(timespec="seconds"),
+        "versija": git_version(),
+        "python": platform.python_version(),
+        "platforma": platform.platform(),
+        "kartojimai": args.kartojimai,
+        "parametrai": {"siuntejai": args.siuntejai, "uzsakovai": args.uzsakovai, "klaidu_dalis": args.klaidu_dalis},
+        "rezultatai": rezultatai,
+    }
+    with open(args.isvestis, "w", encoding="utf-8") as f:
+        json.dump(ataskaita, f, ensure_ascii=False, indent=2)
+
+    senas = None
+    if args.palyginti:
+        with open(args.palyginti, encoding="utf-8") as f:
+            senas = json.load(f)["rezultatai"]
+    print_results(rezultatai, senas)
+    print(f"Rezultatai įrašyti: {args.isvestis}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Šalto paleidimo matavimas: kiek trunka bibliotekų importai ir pirmas puslapio
+# paleidimas be įkelto failo (kol vartotojas pamato įkėlimo lauką).
+# Kiekvienas matavimas vykdomas naujame procese, kad importai nebūtų jau įkelti.
+#   python benchmarks/paleidimo_laikas.py --kartojimai 3
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SAKNIS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMA = os.path.join(SAKNIS, "klaidu_analize.py")
+
+SUNKIOS_BIBLIOTEKOS = ["pandas", "numpy", "matplotlib", "openpyxl", "openai"]
+MODULIAI = [
+    "streamlit", "pandas", "matplotlib.pyplot", "openpyxl", "openai",
+    "duomenys", "analize", "grafikai", "ataskaita", "ai_analize"
+]
+
+IMPORTAS = """
+import sys, time
+sys.path.insert(0, {saknis!r})
+start = time.perf_counter()
+import {modulis}
+print(time.perf_counter() - start)
+"""
+
+PIRMAS_PALEIDIMAS = """
+import json, os, sys, time
+sys.path.insert(0, {saknis!r})
+os.chdir({saknis!r})
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({programa!r}, default_timeout=120)
+at.secrets["openai_api_key"] = "nenaudojamas"
+start = time.perf_counter()
+at.run()
+trukme = time.perf_counter() - start
+print(json.dumps({{
+    "s": trukme,
+    "klaidos": [str(e.value) for e in at.exception],
+    "ikelta": [m for m in {sunkios!r} if m in sys.modules]
+}}))
+"""
+
+
+def run_python(code):
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Šalto paleidimo ir importų trukmė")
+    parser.add_argument("--kartojimai", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Importas':<20} {'Mediana, s':>11}")
+    for modulis in MODULIAI:
+        laikai = [
+            float(run_python(IMPORTAS.format(saknis=SAKNIS, modulis=modulis)))
+            for _ in range(args.kartojimai)
+        ]
+        print(f"{modulis:<20} {statistics.median(laikai):>11.3f}")
+
+    paleidimai = [
+        json.loads(run_python(PIRMAS_PALEIDIMAS.format(saknis=SAKNIS, programa=PROGRAMA, sunkios=SUNKIOS_BIBLIOTEKOS)))
+        for _ in range(args.kartojimai)
+    ]
+    print()
+    print(f"Pirmas puslapio paleidimas be failo: {statistics.median(p['s'] for p in paleidimai):.3f} s (mediana)")
+    print(f"Įkeltos sunkios bibliotekos: {', '.join(paleidimai[0]['ikelta']) or 'nėra'}")
+    if paleidimai[0]["klaidos"]:
+        print(f"Klaidos: {paleidimai[0]['klaidos']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Sintetinių sąskaitų failų generatorius: tas pats stulpelių išdėstymas kaip tikruose
+# failuose (A–D pavadinti stulpeliai, O – klaidos priežastis, P – klaidos aprašymas).
+# Paleidimas:
+#   python benchmarks/sintetiniai_duomenys.py --eilutes 1000 100000 1000000 --katalogas /tmp/sintetiniai
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+MENESIAI = [
+    "SAUSIS", "VASARIS", "KOVAS", "BALANDIS", "GEGUŽĖ", "BIRŽELIS",
+    "LIEPA", "RUGPJŪTIS", "RUGSĖJIS", "SPALIS", "LAPKRITIS", "GRUODIS"
+]
+
+# Priežastys su papildomais tarpais ir tuščios – kaip ranka pildomuose failuose
+PRIEZASTYS = [
+    "Neteisinga suma", " Neteisinga suma ", "Trūksta PVM", "Neteisingas užsakovas",
+    "Neteisinga data", "Dublikatas", "Trūksta užsakymo nr.", "Neteisingas kiekis", ""
+]
+KLAIDOS = ["Suma nesutampa su užsakymu", "Nenurodytas PVM kodas", "Klaida datoje  ", "Kita"]
+
+STULPELIAI = (
+    ["Klientas", "Užsakovas", "Sąskaitos faktūros Nr.", "Siuntėjas"] +
+    [f"Papildomas {i}" for i in range(4, 14)] +
+    ["Klaidos priežastis", "Klaidos", "Pastabos"]
+)
+
+
+def skewed_choice(rng, values, n, s=1.1, tuscia_dalis=0.01):
+    weights = 1 / np.arange(1, len(values) + 1) ** s
+    weights = np.append(weights / weights.sum() * (1 - tuscia_dalis), tuscia_dalis)
+    return np.array(values + [None], dtype=object)[rng.choice(len(values) + 1, n, p=weights)]
+
+
+def synthetic_frame(eiluciu_skaicius, siuntejai=200, uzsakovai=300, klaidu_dalis=0.15, seed=0):
+    rng = np.random.default_rng(seed)
+    n = eiluciu_skaicius
+
+    menesiai = np.array(MENESIAI + ["BE MĖNESIO"], dtype=object)
+    menuo = rng.choice(len(menesiai), n, p=[0.08] * 12 + [0.04])
+    klientas = np.char.add("UAB Klientas ", rng.integers(0, 500, n).astype(str)).astype(object)
+    klientas = klientas + " " + menesiai[menuo] + " 2025"
+
+    # Keli siuntėjai ir užsakovai sudaro didžiąją dalį srauto (Zipf pasiskirstymas), ~1 % tuščių
+    siuntejas = skewed_choice(rng, [f"siuntejas{i}@imone.lt" for i in range(siuntejai)], n)
+    uzsakovas = skewed_choice(rng, [f"Užsakovas {i}" for i in range(uzsakovai)], n)
+
+    # ~10 % sąskaitų turi kelias eilutes, ~1 % be numerio
+    saskaita = np.char.add("SF", rng.integers(0, int(n * 0.9) + 1, n).astype(str)).astype(object)
+    saskaita[rng.random(n) < 0.01] = None
+
+    yra_klaida = rng.random(n) < klaidu_dalis
+    priezastis = np.array(PRIEZASTYS, dtype=object)[rng.integers(0, len(PRIEZASTYS), n)]
+    klaida = np.array(KLAIDOS, dtype=object)[rng.integers(0, len(KLAIDOS), n)]
+    priezastis[~yra_klaida] = None
+    klaida[~yra_klaida] = None
+
+    stulpeliai = {
+        "Klientas": klientas,
+        "Užsakovas": uzsakovas,
+        "Sąskaitos faktūros Nr.": saskaita,
+        "Siuntėjas": siuntejas,
+    }
+    for i in range(4, 14):
+        stulpeliai[f"Papildomas {i}"] = rng.random(n).round(2)
+    stulpeliai["Klaidos priežastis"] = priezastis
+    stulpeliai["Klaidos"] = klaida
+    stulpeliai["Pastabos"] = np.where(rng.random(n) < 0.05, "Patikrinti", None)
+    return pd.DataFrame(stulpeliai, columns=STULPELIAI)
+
+
+def workbook_bytes(df):
+    buffer = io.BytesIO()
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+
+    if xlsxwriter is not None:
+        wb = xlsxwriter.Workbook(buffer, {"constant_memory": True})
+        ws = wb.add_worksheet("Duomenys")
+        ws.write_row(0, 0, list(df.columns))
+        for i, row in enumerate(rows, start=1):
+            ws.write_row(i, 0, row)
+        wb.close()
+    else:
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Duomenys")
+        ws.append(list(df.columns))
+        for row in rows:
+            ws.append(list(row))
+        wb.save(buffer)
+    return buffer.getvalue()
+
+
+def workbook_path(katalogas, eiluciu_skaicius, siuntejai=200, uzsakovai=300, klaidu_dalis=0.15, seed=0):
+    return os.path.join(
+        katalogas, f"sintetiniai_{eiluciu_skaicius}_s{siuntejai}_u{uzsakovai}_k{klaidu_dalis}_{seed}.xlsx"
+    )
+
+
+def synthetic_workbook(eiluciu_skaicius, katalogas=None, **kwargs):
+    # Jei nurodytas katalogas, failas sugeneruojamas tik pirmą kartą
+    path = workbook_path(katalogas, eiluciu_skaicius, **kwargs) if katalogas is not None else None
+    if path is not None and os.path.exists(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    data = workbook_bytes(synthetic_frame(eiluciu_skaicius, **kwargs))
+    if path is not None:
+        os.makedirs(katalogas, exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sintetinių sąskaitų failų generatorius")
+    parser.add_argument("--eilutes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--siuntejai", type=int, default=200)
+    parser.add_argument("--uzsakovai", type=int, default=300)
+    parser.add_argument("--klaidu-dalis", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--katalogas", default=".")
+    args = parser.parse_args()
+
+    parametrai = dict(siuntejai=args.siuntejai, uzsakovai=args.uzsakovai, klaidu_dalis=args.klaidu_dalis, seed=args.seed)
+    for eiluciu_skaicius in args.eilutes:
+        start = time.perf_counter()
+        synthetic_workbook(eiluciu_skaicius, args.katalogas, **parametrai)
+        path = workbook_path(args.katalogas, eiluciu_skaicius, **parametrai)
+        print(f"{path}: {eiluciu_skaicius} eil., {os.path.getsize(path) / 1e6:.1f} MB, {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# duomenys.map_unique palyginimas su eilutės po eilutės .apply: abu būdai turi duoti
+# tas pačias reikšmes, o map_unique funkciją kviečia tik unikalioms reikšmėms.
+#   python benchmarks/unikalios_reiksmes.py --eilutes 1000000
+# Grąžinamas klaidos kodas 1, jei bent vieno stulpelio reikšmės nesutampa.
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from duomenys import clean_text, extract_month, map_unique  # noqa: E402
+from sintetiniai_duomenys import synthetic_frame  # noqa: E402
+
+# Stulpelis ir jam taikoma funkcija, kaip duomenys.clean_data
+ATVEJAI = [
+    ("Klientas", extract_month),
+    ("Klaidos priežastis", clean_text),
+    ("Klaidos", clean_text),
+]
+
+
+def best_time(func, kartojimai):
+    laikai = []
+    for _ in range(kartojimai):
+        start = time.perf_counter()
+        result = func()
+        laikai.append(time.perf_counter() - start)
+    return result, min(laikai)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="map_unique ir .apply palyginimas")
+    parser.add_argument("--eilutes", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--kartojimai", type=int, default=3)
+    args = parser.parse_args()
+
+    nesutampa = 0
+    print(f"{'Eilutės':>9} {'Stulpelis':<20} {'Funkcija':<14} {'Unikalių':>9} {'.apply, s':>10} {'map_unique, s':>14} {'Kartai':>7}")
+    for eiluciu_skaicius in args.eilutes:
+        df = synthetic_frame(eiluciu_skaicius)
+        for col, func in ATVEJAI:
+            # Stulpeliai kaip po read_workbook – Python objektai
+            series = df[col].astype(object)
+            tiketa, apply_laikas = best_time(lambda: series.apply(func), args.kartojimai)
+            gauta, unique_laikas = best_time(lambda: map_unique(series, func), args.kartojimai)
+
+            sutampa = tiketa.tolist() == gauta.tolist() and tiketa.index.equals(gauta.index)
+            nesutampa += not sutampa
+            print(
+                f"{eiluciu_skaicius:>9} {col:<20} {func.__name__:<14} {series.nunique():>9} "
+                f"{apply_laikas:>10.3f} {unique_laikas:>14.3f} {apply_laikas / unique_laikas:>7.1f}"
+                + ("" if sutampa else "  NESUTAMPA")
+            )
+
+    print("Reikšmės sutampa." if not nesutampa else f"Nesutampančių stulpelių: {nesutampa}")
+    sys.exit(1 if nesutampa else 0)
+
+
+if __name__ == "__main__":
+    main()
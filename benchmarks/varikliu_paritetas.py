@@ -0,0 +1,156 @@
+# pandas ir Polars variklių palyginimas: abu varikliai turi grąžinti tas pačias
+# lenteles ir KPI su keliais filtrų rinkiniais, vienam ir keliems failams, taip pat
+# failams, kuriuose dalis numerių ir kodų įvesti skaičiais. Tikrinami ir stulpelių tipai.
+# Kartu matuojama paruošimo, kubo ir agregavimo trukmė. Paleidimas:
+#   python benchmarks/varikliu_paritetas.py --eilutes 1000 100000
+# Grąžinamas klaidos kodas 1, jei bent viena lentelė nesutampa.
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import analize  # noqa: E402
+import duomenys  # noqa: E402
+import polars_analize  # noqa: E402
+from sintetiniai_duomenys import synthetic_frame, synthetic_workbook, workbook_bytes  # noqa: E402
+
+LENTELES = ["summary", "priezastys", "siuntejai_stats", "uzsakovai_stats", "siuntejai_proc", "pareto", "klaidos"]
+KPI = ["viso_dokumentu", "viso_klaidu", "klaidu_proc", "be_klaidu"]
+
+VARIKLIAI = {
+    "pandas": (duomenys.load_workbooks, analize.build_cube, analize.aggregate_cube, analize.default_filters),
+    "polars": (
+        polars_analize.load_workbooks, polars_analize.build_cube,
+        polars_analize.aggregate_cube, polars_analize.default_filters
+    ),
+}
+
+
+def mixed_types_workbook(eiluciu_skaicius, seed=0):
+    # Kaip ranka pildomuose failuose: dalis sąskaitų numerių, siuntėjų ir užsakovų įvesti
+    # skaičiais (tas pats numeris pasitaiko ir skaičiumi, ir tekstu), o O ir P stulpeliuose
+    # yra skaičių ir loginių reikšmių
+    df = synthetic_frame(eiluciu_skaicius, seed=seed)
+    rng = np.random.default_rng(seed)
+    n = len(df)
+
+    numeris = rng.integers(0, int(n * 0.9) + 1, n).astype(object)
+    rusis = rng.integers(0, 3, n)
+    saskaita = np.where(rusis == 1, numeris.astype(str), np.char.add("SF", numeris.astype(str))).astype(object)
+    saskaita[rusis == 0] = numeris[rusis == 0]
+    saskaita[rng.random(n) < 0.01] = None
+    df["Sąskaitos faktūros Nr."] = saskaita
+
+    for col, kiekis in [("Siuntėjas", 200), ("Užsakovas", 300)]:
+        values = df[col].to_numpy(dtype=object)
+        skaiciai = rng.random(n) < 0.3
+        values[skaiciai] = rng.integers(0, kiekis, skaiciai.sum()).astype(object)
+        df[col] = values
+
+    ne_tekstai = np.array([7, 0, 2.5, True, False], dtype=object)
+    for col in ["Klaidos priežastis", "Klaidos"]:
+        values = df[col].to_numpy(dtype=object)
+        keisti = df[col].notna().to_numpy() & (rng.random(n) < 0.3)
+        values[keisti] = ne_tekstai[rng.integers(0, len(ne_tekstai), keisti.sum())]
+        df[col] = values
+    return workbook_bytes(df)
+
+
+def filter_sets(menesiai, siuntejai, uzsakovai):
+    return {
+        "visi": (menesiai, siuntejai, uzsakovai, False),
+        "dalis": (menesiai[1:4], siuntejai[::2], uzsakovai, False),
+        "tik klaidos": (menesiai, siuntejai[:30], uzsakovai[5:], True),
+        "tuščias": (menesiai[:1], [], uzsakovai, False),
+    }
+
+
+def run_engine(name, files):
+    load_workbooks, build_cube, aggregate_cube, default_filters = VARIKLIAI[name]
+    laikai = {}
+
+    start = time.perf_counter()
+    df, removed = load_workbooks(files)
+    laikai["paruošimas"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cube = build_cube(df)
+    laikai["kubas"] = time.perf_counter() - start
+
+    filtrai = default_filters(df)
+    rezultatai = {}
+    start = time.perf_counter()
+    for pavadinimas, args in filter_sets(*filtrai).items():
+        rezultatai[pavadinimas] = analize.build_results(aggregate_cube(cube, *args))
+    laikai["agregavimas"] = time.perf_counter() - start
+    return [list(f) for f in filtrai], removed, rezultatai, laikai
+
+
+def compare(pandas_run, polars_run):
+    skirtumai = []
+    if pandas_run[0] != polars_run[0]:
+        skirtumai.append("filtrų reikšmės")
+    if pandas_run[1] != polars_run[1]:
+        skirtumai.append(f"pašalintos eilutės: {pandas_run[1]} != {polars_run[1]}")
+
+    for pavadinimas, tiketa in pandas_run[2].items():
+        gauta = polars_run[2][pavadinimas]
+        for lentele in LENTELES:
+            try:
+                pd.testing.assert_frame_equal(
+                    tiketa[lentele].reset_index(drop=True), gauta[lentele].reset_index(drop=True),
+                    check_dtype=True, check_categorical=False
+                )
+            except AssertionError as e:
+                skirtumai.append(f"{pavadinimas} / {lentele}: {e}")
+        for kpi in KPI:
+            if tiketa[kpi] != gauta[kpi]:
+                skirtumai.append(f"{pavadinimas} / {kpi}: {tiketa[kpi]} != {gauta[kpi]}")
+    return skirtumai
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pandas ir Polars variklių rezultatų palyginimas")
+    parser.add_argument("--eilutes", type=int, nargs="+", default=[1_000, 100_000])
+    parser.add_argument("--failai", type=int, default=3, help="kiek failų jungiama kelių failų atveju")
+    parser.add_argument("--katalogas", default=None, help="kur laikyti sugeneruotus failus tarp paleidimų")
+    args = parser.parse_args()
+
+    klaidos = 0
+    print(f"{'Atvejis':<22} {'Etapas':<12} {'pandas, s':>10} {'polars, s':>10}")
+    for eiluciu_skaicius in args.eilutes:
+        atvejai = {
+            f"{eiluciu_skaicius} eil.": [("vienas.xlsx", synthetic_workbook(eiluciu_skaicius, args.katalogas))],
+            f"{eiluciu_skaicius} eil. x{args.failai}": [
+                (f"failas{seed}.xlsx", synthetic_workbook(eiluciu_skaicius, args.katalogas, seed=seed))
+                for seed in range(args.failai)
+            ],
+            f"{eiluciu_skaicius} eil. mišrūs": [("misrus.xlsx", mixed_types_workbook(eiluciu_skaicius))],
+            f"{eiluciu_skaicius} eil. mišrūs x{args.failai}": [
+                (f"misrus{seed}.xlsx", mixed_types_workbook(eiluciu_skaicius, seed=seed))
+                for seed in range(args.failai)
+            ],
+        }
+        for atvejis, files in atvejai.items():
+            pandas_run = run_engine("pandas", files)
+            polars_run = run_engine("polars", files)
+            for etapas in pandas_run[3]:
+                print(f"{atvejis:<22} {etapas:<12} {pandas_run[3][etapas]:>10.4f} {polars_run[3][etapas]:>10.4f}")
+
+            skirtumai = compare(pandas_run, polars_run)
+            klaidos += len(skirtumai)
+            for skirtumas in skirtumai:
+                print(f"  NESUTAMPA {atvejis}: {skirtumas}")
+
+    print("Rezultatai sutampa." if not klaidos else f"Nesutapimų: {klaidos}")
+    sys.exit(1 if klaidos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    # Greitesnis (Rust) xlsx skaitytuvas, jei įdiegtas
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
+# Kiek failų apdorojama lygiagrečiai (po vieną procesą failui)
+DARBUOTOJU_SKAICIUS = int(os.environ.get("KLAIDU_DARBUOTOJAI", str(os.cpu_count() or 1)))
+
+PRIVALOMI_STULPELIAI = ["Klientas", "Užsakovas", "Sąskaitos faktūros Nr.", "Siuntėjas"]
+STULPELIS_O = 14  # Klaidos priežastis
+STULPELIS_P = 15  # Klaidos
+
+MENESIU_TVARKA = [
+    "Sausis", "Vasaris", "Kovas", "Balandis", "Gegužė", "Birželis",
+    "Liepa", "Rugpjūtis", "Rugsėjis", "Spalis", "Lapkritis", "Gruodis"
+]
+
+# Tekstai, kuriuos pd.read_excel pagal nutylėjimą laiko tuščiais
+NA_REIKSMES = {
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+}
+
+# Artimų tekstų (pvz., su rašybos klaida) sujungimo riba pagal n-gramų Jaccard panašumą;
+# 0 – jungiami tik tekstai, kurie skiriasi raidžių dydžiu, tarpais ar skyryba
+PANASUMO_RIBA = float(os.environ.get("KLAIDU_PANASUMO_RIBA", "0"))
+NGRAMU_ILGIS = 3
+NGRAMU_KREPSIAI = 1 << 20
+# MinHash parašo ilgis ir leistina tikimybė praleisti porą, kurios panašumas lygus ribai
+MINHASH_KIEKIS = 128
+MINHASH_PIRMINIS = (1 << 31) - 1
+PRALEIDIMO_TIKIMYBE = 1e-3
+
+SKYRYBA_RE = re.compile(r"[\W_]+")
+
+MENESIO_RE = re.compile(
+    r"\b(KOVAS|VASARIS|SAUSIS|BALANDIS|GEGUŽĖ|BIRŽELIS|LIEPA|RUGPJŪTIS|RUGSĖJIS|SPALIS|LAPKRITIS|GRUODIS)\b"
+)
+METU_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+
+
+def extract_month(text):
+    if isinstance(text, str):
+        match = MENESIO_RE.search(text.upper())
+        if match:
+            return match.group(1).capitalize()
+    return "Nežinoma"
+
+
+def extract_year(text):
+    # Paskutiniai tekste esantys metai (pvz., "... KOVAS 2025"); jų nesant – None
+    if isinstance(text, str):
+        metai = METU_RE.findall(text)
+        if metai:
+            return metai[-1]
+    return None
+
+
+def month_order(menuo, unknown=99):
+    # Mėnuo "Sausis" arba istorijoje su metais "2025 Sausis": pirma pagal metus, tada pagal mėnesį
+    metai, _, pavadinimas = menuo.rpartition(" ")
+    return metai, MENESIU_TVARKA.index(pavadinimas) if pavadinimas in MENESIU_TVARKA else unknown
+
+
+def clean_text(value):
+    if pd.isna(value):
+        return None
+    text = str(value).strip()
+    return text if text else None
+
+
+def map_unique(series, func):
+    # Funkcija skaičiuojama tik unikalioms reikšmėms ir išskleidžiama pagal kodus.
+    # Tuščios reikšmės gauna kodą -1, todėl func(None) dedamas paskutinis.
+    codes, uniques = pd.factorize(series)
+    mapped = np.array([func(value) for value in uniques] + [func(None)], dtype=object)
+    return pd.Series(mapped[codes], index=series.index)
+
+
+def invoice_text(series):
+    # Sąskaitos numeris visada tekstas: Excel langelyje jis gali būti ir skaičius,
+    # o Parquet ir Polars stulpelyje negali būti maišomi skaičiai ir tekstai.
+    # Todėl 123 ir "123" laikomi ta pačia sąskaita abiejuose varikliuose.
+    return map_unique(series, lambda value: None if value is None else str(value))
+
+
+# ----------------------------
+# KANONINIAI TEKSTAI
+# ----------------------------
+def normalize_key(text):
+    # Raidžių dydis, tarpai ir skyryba nesvarbūs; vien iš skyrybos sudarytas tekstas paliekamas
+    key = SKYRYBA_RE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+    return key or text
+
+
+def ngram_hashes(key, n=NGRAMU_ILGIS):
+    padded = f" {key} "
+    return {
+        zlib.crc32(padded[i:i + n].encode("utf-8")) % NGRAMU_KREPSIAI
+        for i in range(max(len(padded) - n + 1, 1))
+    }
+
+
+def minhash_signature(key_grams, a, b):
+    grams = np.fromiter(key_grams, dtype=np.uint64, count=len(key_grams))
+    return ((np.outer(a, grams) + b[:, None]) % MINHASH_PIRMINIS).min(axis=1).astype(np.uint32)
+
+
+def band_rows(threshold, count=MINHASH_KIEKIS):
+    # Kuo daugiau eilučių juostoje, tuo mažiau atsitiktinių kandidatų; imama daugiausia
+    # tiek, kad pora su panašumu = riba būtų praleista ne dažniau nei PRALEIDIMO_TIKIMYBE
+    for rows in range(count, 1, -1):
+        if (1 - threshold ** rows) ** (count // rows) <= PRALEIDIMO_TIKIMYBE:
+            return rows
+    return 1
+
+
+def near_duplicate_groups(keys, weights, threshold):
+    # Kiekvienam raktui grąžinamas jo grupės atstovo indeksas. Raktai apdorojami nuo
+    # dažniausio ir lyginami tik su atstovais. Kandidatai atrenkami MinHash juostomis
+    # (LSH): atstovas tampa kandidatu tik tada, kai sutampa visa bent vienos juostos
+    # parašo dalis, todėl dažnos n-gramos nepadaro kiekvieno atstovo kandidatu.
+    # Kandidatų panašumas tikrinamas tiksliai pagal n-gramų aibes.
+    rng = np.random.default_rng(0)
+    a = rng.integers(1, MINHASH_PIRMINIS, MINHASH_KIEKIS, dtype=np.uint64)
+    b = rng.integers(0, MINHASH_PIRMINIS, MINHASH_KIEKIS, dtype=np.uint64)
+    rows = band_rows(threshold)
+    bands = [defaultdict(list) for _ in range(MINHASH_KIEKIS // rows)]
+
+    grams = [ngram_hashes(key) for key in keys]
+    parent = list(range(len(keys)))
+
+    for i in sorted(range(len(keys)), key=lambda i: -weights[i]):
+        signature = minhash_signature(grams[i], a, b)
+        buckets = [signature[k * rows:(k + 1) * rows].tobytes() for k in range(len(bands))]
+        candidates = {j for band, bucket in zip(bands, buckets) for j in band.get(bucket, ())}
+
+        best, best_similarity = i, threshold
+        for j in sorted(candidates):
+            shared = len(grams[i] & grams[j])
+            similarity = shared / (len(grams[i]) + len(grams[j]) - shared)
+            if similarity >= best_similarity:
+                best, best_similarity = j, similarity
+
+        parent[i] = best
+        if best == i:
+            for band, bucket in zip(bands, buckets):
+                band[bucket].append(i)
+    return parent
+
+
+def canonical_labels(uniques, counts, threshold=PANASUMO_RIBA):
+    # Kiekvienai unikaliai reikšmei (pirmo pasirodymo tvarka) grąžinamas kanoninis
+    # tekstas – dažniausias grupės variantas
+    key_codes, keys = pd.factorize(np.array([normalize_key(value) for value in uniques], dtype=object))
+
+    labels = [None] * len(keys)
+    for u in np.argsort(-np.asarray(counts), kind="stable"):
+        if labels[key_codes[u]] is None:
+            labels[key_codes[u]] = uniques[u]
+
+    if threshold > 0:
+        key_counts = np.bincount(key_codes, weights=counts)
+        parent = near_duplicate_groups(list(keys), key_counts, threshold)
+        labels = [labels[p] for p in parent]
+
+    return np.array(labels, dtype=object)[key_codes]
+
+
+def canonical_text(series, threshold=PANASUMO_RIBA):
+    # Žodynas neapdorotas tekstas -> kanoninis tekstas skaičiuojamas tik unikalioms reikšmėms
+    codes, uniques = pd.factorize(series)
+    if not len(uniques):
+        return series
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    # Tuščios reikšmės (kodas -1) gauna paskutinį None
+    mapped = np.append(canonical_labels(uniques, counts, threshold), None)
+    return pd.Series(mapped[codes], index=series.index)
+
+
+def to_category(series, categories=None):
+    # Ne tuščios reikšmės paverčiamos tekstu, kaip filtruose
+    values = series.where(series.isna(), series.astype(str))
+    if categories is None:
+        categories = sorted(values.dropna().unique())
+    return pd.Categorical(values, categories=categories)
+
+
+def iter_sheet_rows(file_bytes):
+    if CalamineWorkbook is not None:
+        sheet = CalamineWorkbook.from_filelike(io.BytesIO(file_bytes)).get_sheet_by_index(0)
+        start_row, start_col = sheet.start or (0, 0)
+        for _ in range(start_row):
+            yield ()
+        padding = [None] * start_col
+        for row in sheet.iter_rows():
+            yield padding + row if padding else row
+        return
+
+    # openpyxl įkeliamas tik tada, kai nėra calamine
+    from openpyxl import load_workbook
+
+    wb = load_workbook(io.BytesIO(file_bytes), read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def is_blank_row(row):
+    return all(v is None or v == "" for v in row)
+
+
+def excel_values(values):
+    # Kaip pd.read_excel: sveiki float -> int, tušti ir NA tekstai -> None. Loginės
+    # reikšmės paverčiamos tekstu, nes pd.factorize True laiko lygiu 1, o False – 0.
+    result = []
+    for v in values:
+        if v.__class__ is float and v.is_integer():
+            v = int(v)
+        elif v.__class__ is str and v in NA_REIKSMES:
+            v = None
+        elif v.__class__ is bool:
+            v = str(v)
+        result.append(v)
+    return result
+
+
+def read_workbook(file_bytes):
+    rows = iter_sheet_rows(file_bytes)
+
+    header = next((row for row in rows if not is_blank_row(row)), None)
+    if header is None:
+        raise ValueError("Failas tuščias.")
+    header = list(header)
+
+    # ----------------------------
+    # PRIVALOMŲ STULPELIŲ PATIKRA (tik pagal antraštę)
+    # ----------------------------
+    missing_named = [col for col in PRIVALOMI_STULPELIAI if col not in header]
+
+    if missing_named:
+        raise ValueError(f"Faile trūksta šių stulpelių: {', '.join(missing_named)}")
+
+    if len(header) < 16:
+        raise ValueError("Faile nepakanka stulpelių. Reikia bent 16 stulpelių, kad būtų galima paimti O ir P.")
+
+    # ----------------------------
+    # TIK REIKALINGI STULPELIAI
+    # ----------------------------
+    columns = PRIVALOMI_STULPELIAI + ["Klaidos_priežastis", "Klaidos"]
+    positions = [header.index(col) for col in PRIVALOMI_STULPELIAI] + [STULPELIS_O, STULPELIS_P]
+    width = max(positions) + 1
+    values = [[] for _ in positions]
+
+    for row in rows:
+        if len(row) < width:
+            row = tuple(row) + (None,) * (width - len(row))
+        picked = [row[i] for i in positions]
+        if is_blank_row(picked) and is_blank_row(row):
+            continue
+        for column_values, value in zip(values, picked):
+            column_values.append(value)
+
+    return pd.DataFrame({
+        col: pd.Series(excel_values(column_values))
+        for col, column_values in zip(columns, values)
+    })
+
+
+def clean_data(df):
+    # ----------------------------
+    # DUOMENŲ PARUOŠIMAS
+    # ----------------------------
+    df["Klaidos_priežastis"] = map_unique(df["Klaidos_priežastis"], clean_text)  # O
+    df["Klaidos"] = map_unique(df["Klaidos"], clean_text)                        # P
+    df["Mėnuo"] = map_unique(df["Klientas"], extract_month)
+    df["Metai"] = map_unique(df["Klientas"], extract_year)
+    df["Sąskaitos faktūros Nr."] = invoice_text(df["Sąskaitos faktūros Nr."])
+    df["Yra klaida"] = df["Klaidos"].notna()
+    # Klientas reikalingas tik mėnesiui ir metams nustatyti, o užima daugiausia atminties
+    return df.drop(columns="Klientas")
+
+
+def encode_categories(df):
+    # ----------------------------
+    # KATEGORIJOS FILTRAMS IR GRUPAVIMUI
+    # ----------------------------
+    menesiai = sorted(df["Mėnuo"].unique(), key=month_order)
+    df["Mėnuo"] = to_category(df["Mėnuo"], menesiai)
+    # Priežasčių variantai sujungiami po failų sujungimo, kad kanoninis tekstas būtų bendras.
+    # Klaidų aprašymai negrupuojami, todėl klaidų sąraše ir ataskaitoje lieka tokie, kokie faile.
+    df["Klaidos_priežastis"] = canonical_text(df["Klaidos_priežastis"])
+    for col in ["Metai", "Siuntėjas", "Užsakovas", "Klaidos_priežastis", "Klaidos"]:
+        df[col] = to_category(df[col])
+    return df
+
+
+def prepare_data(df):
+    return encode_categories(clean_data(df))
+
+
+def parse_workbook(file_bytes):
+    # Vykdoma darbiniame procese: grąžinami išvalyti, bet dar nekoduoti duomenys,
+    # nes kategorijos sudaromos tik sujungus visus failus
+    return clean_data(read_workbook(file_bytes))
+
+
+def workbook_key(files):
+    # Failų rinkinio raktas: turinio maišai ta pačia tvarka, nes tvarka lemia,
+    # kurio failo eilutės paliekamos pasikartojant sąskaitai
+    digest = hashlib.sha256()
+    for _, file_bytes in files:
+        digest.update(hashlib.sha256(file_bytes).digest())
+    return digest.hexdigest()
+
+
+def drop_cross_file_duplicates(df, file_index):
+    # Ta pati sąskaita keliuose failuose paliekama tik iš pirmojo failo, kuriame ji yra.
+    # To paties failo eilutės neliečiamos – viena sąskaita gali turėti kelias eilutes.
+    codes, uniques = pd.factorize(df["Sąskaitos faktūros Nr."])
+    has_invoice = codes >= 0
+    first_file = np.full(len(uniques), file_index.max() + 1)
+    np.minimum.at(first_file, codes[has_invoice], file_index[has_invoice])
+    keep = ~has_invoice | (file_index == first_file[codes])
+    return df[keep].reset_index(drop=True), int((~keep).sum())
+
+
+def load_workbooks(files, executor=None):
+    # files – (pavadinimas, baitai) poros. Kiekvienas failas nuskaitomas ir išvalomas
+    # atskirame procese, todėl bendrą laiką lemia lėčiausias failas.
+    if executor is None or len(files) == 1:
+        parsed = [parse_workbook(file_bytes) for _, file_bytes in files]
+    else:
+        futures = [executor.submit(parse_workbook, file_bytes) for _, file_bytes in files]
+        parsed = []
+        for (name, _), future in zip(files, futures):
+            try:
+                parsed.append(future.result())
+            except ValueError as e:
+                for other in futures:
+                    other.cancel()
+                raise ValueError(f"{name}: {e}") from e
+
+    if len(parsed) == 1:
+        return encode_categories(parsed[0]), 0
+
+    file_index = np.repeat(np.arange(len(parsed)), [len(part) for part in parsed])
+    df = pd.concat(parsed, ignore_index=True)
+    df, removed = drop_cross_file_duplicates(df, file_index)
+    return encode_categories(df), removed
+
+
+def process_pool(max_workers=None):
+    # forkserver/spawn vietoje fork: Streamlit serveris daugiagijis, o fork kopijuotų jo būseną
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=max_workers or DARBUOTOJU_SKAICIUS, mp_context=context)
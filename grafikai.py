@@ -0,0 +1,336 @@
+import functools
+import hashlib
+import io
+import textwrap
+
+import pandas as pd
+
+GRAFIKU_DPI = 200
+
+
+@functools.cache
+def pyplot():
+    # matplotlib įkeliamas tik piešiant pirmą grafiką
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+# ----------------------------
+# GRAFIKAI
+# ----------------------------
+def wrap_label(text, width=18):
+    if pd.isna(text):
+        return "Nenurodyta"
+    return "\n".join(textwrap.wrap(str(text), width=width))
+
+
+def full_label(text):
+    return "Nenurodyta" if pd.isna(text) else str(text)
+
+
+def ellipsis_label(text, max_len=30):
+    text = full_label(text)
+    return text if len(text) <= max_len else text[:max_len - 3] + "..."
+
+
+def draw_months(summary):
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(9, 5.5))
+    ax.plot(
+        summary["Mėnuo"],
+        summary["Sąskaitų_procentas"],
+        label="Sąskaitų kiekis (%)",
+        marker="o",
+        linewidth=2
+    )
+    ax.plot(
+        summary["Mėnuo"],
+        summary["Klaidų_procentas"],
+        label="Klaidų procentas (%)",
+        marker="o",
+        linewidth=2
+    )
+    ax.set_ylabel("Procentai (%)")
+    ax.set_xlabel("Mėnuo")
+    ax.set_ylim(0, 100)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    ax.set_title("Sąskaitų kiekis ir klaidų procentas")
+    return fig
+
+
+def draw_reasons(priezastys):
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.barh(priezastys["Klaidos priežastis"], priezastys["Klaidų skaičius"])
+    ax.set_title("Klaidos pagal priežastį")
+    ax.set_xlabel("Klaidų skaičius")
+    ax.invert_yaxis()
+    ax.grid(axis="x", alpha=0.3)
+    return fig
+
+
+def draw_top_bars(top, label_col, value_col, title, xlabel):
+    plt = pyplot()
+    labels = top[label_col].apply(lambda x: ellipsis_label(x, 32))
+
+    fig, ax = plt.subplots(figsize=(8, 5))
+    ax.barh(labels, top[value_col])
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.invert_yaxis()
+    ax.grid(axis="x", alpha=0.3)
+    return fig
+
+
+def draw_sender_count(top_siuntejai):
+    return draw_top_bars(
+        top_siuntejai, "Siuntėjas", "Klaidų skaičius",
+        "TOP siuntėjai pagal klaidų kiekį", "Klaidų skaičius"
+    )
+
+
+def draw_sender_proc(top_siuntejai):
+    return draw_top_bars(
+        top_siuntejai, "Siuntėjas", "Klaidų_procentas",
+        "TOP siuntėjai pagal klaidų procentą", "Klaidų procentas (%)"
+    )
+
+
+def draw_customers(top_uzsakovai):
+    return draw_top_bars(
+        top_uzsakovai, "Užsakovas", "Klaidų skaičius",
+        "TOP užsakovai pagal klaidų kiekį", "Klaidų skaičius"
+    )
+
+
+def draw_pareto(pareto_top):
+    plt = pyplot()
+    labels = pareto_top["Siuntėjas"].apply(lambda x: ellipsis_label(x, 32))
+
+    fig, ax1 = plt.subplots(figsize=(10, 6.5))
+    ax1.barh(labels, pareto_top["Klaidų skaičius"])
+    ax1.set_xlabel("Klaidų skaičius")
+    ax1.set_ylabel("Siuntėjas")
+    ax1.grid(axis="x", alpha=0.3)
+    ax1.invert_yaxis()
+
+    ax2 = ax1.twiny()
+    ax2.plot(
+        pareto_top["Kumuliacinis %"],
+        labels,
+        color="red",
+        marker="o",
+        linewidth=2
+    )
+    ax2.set_xlabel("Kumuliacinis %")
+    ax2.set_xlim(0, 110)
+    ax2.axvline(80, color="gray", linestyle="--", linewidth=1)
+
+    ax2.set_title("Pareto analizė – TOP siuntėjai")
+    return fig
+
+
+# ----------------------------
+# VEGA-LITE GRAFIKAI
+# ----------------------------
+# Piešiami naršyklėje: serveris siunčia tik mažą agreguotą lentelę ir specifikaciją,
+# todėl PNG kodavimo nereikia, o užvedimas pelės žymekliu neperkrauna puslapio.
+# Grąžinama (duomenys, specifikacija) pora.
+def vega_months(summary):
+    data = summary.melt(
+        id_vars="Mėnuo",
+        value_vars=["Sąskaitų_procentas", "Klaidų_procentas"],
+        var_name="Rodiklis",
+        value_name="Procentai"
+    )
+    data["Rodiklis"] = data["Rodiklis"].map({
+        "Sąskaitų_procentas": "Sąskaitų kiekis (%)",
+        "Klaidų_procentas": "Klaidų procentas (%)"
+    })
+    spec = {
+        "title": "Sąskaitų kiekis ir klaidų procentas",
+        "mark": {"type": "line", "point": True, "strokeWidth": 2},
+        "encoding": {
+            "x": {"field": "Mėnuo", "type": "nominal", "sort": None, "title": "Mėnuo"},
+            "y": {
+                "field": "Procentai", "type": "quantitative",
+                "scale": {"domain": [0, 100]}, "title": "Procentai (%)"
+            },
+            "color": {"field": "Rodiklis", "type": "nominal", "sort": None, "title": None},
+            "tooltip": [
+                {"field": "Mėnuo", "type": "nominal"},
+                {"field": "Rodiklis", "type": "nominal"},
+                {"field": "Procentai", "type": "quantitative"}
+            ]
+        }
+    }
+    return data, spec
+
+
+def vega_bars(labels, values, names, title, xlabel):
+    # Juostos rodomos lentelės tvarka (didžiausia viršuje), kaip matplotlib grafikuose
+    data = pd.DataFrame({"Pavadinimas": labels, "Reikšmė": values, "Pilnas pavadinimas": names})
+    spec = {
+        "title": title,
+        "mark": "bar",
+        "encoding": {
+            "y": {"field": "Pavadinimas", "type": "nominal", "sort": None, "title": None},
+            "x": {"field": "Reikšmė", "type": "quantitative", "title": xlabel},
+            "tooltip": [
+                {"field": "Pilnas pavadinimas", "type": "nominal", "title": "Pavadinimas"},
+                {"field": "Reikšmė", "type": "quantitative", "title": xlabel}
+            ]
+        }
+    }
+    return data, spec
+
+
+def vega_reasons(priezastys):
+    names = priezastys["Klaidos priežastis"].astype(object).to_numpy()
+    return vega_bars(
+        names, priezastys["Klaidų skaičius"].to_numpy(), names,
+        "Klaidos pagal priežastį", "Klaidų skaičius"
+    )
+
+
+def vega_top_bars(top, label_col, value_col, title, xlabel):
+    return vega_bars(
+        [ellipsis_label(x, 32) for x in top[label_col]],
+        top[value_col].to_numpy(),
+        [full_label(x) for x in top[label_col]],
+        title, xlabel
+    )
+
+
+def vega_sender_count(top_siuntejai):
+    return vega_top_bars(
+        top_siuntejai, "Siuntėjas", "Klaidų skaičius",
+        "TOP siuntėjai pagal klaidų kiekį", "Klaidų skaičius"
+    )
+
+
+def vega_sender_proc(top_siuntejai):
+    return vega_top_bars(
+        top_siuntejai, "Siuntėjas", "Klaidų_procentas",
+        "TOP siuntėjai pagal klaidų procentą", "Klaidų procentas (%)"
+    )
+
+
+def vega_customers(top_uzsakovai):
+    return vega_top_bars(
+        top_uzsakovai, "Užsakovas", "Klaidų skaičius",
+        "TOP užsakovai pagal klaidų kiekį", "Klaidų skaičius"
+    )
+
+
+def vega_pareto(pareto_top):
+    data = pd.DataFrame({
+        "Siuntėjas": [ellipsis_label(x, 32) for x in pareto_top["Siuntėjas"]],
+        "Pilnas pavadinimas": [full_label(x) for x in pareto_top["Siuntėjas"]],
+        "Klaidų skaičius": pareto_top["Klaidų skaičius"].to_numpy(),
+        "Kumuliacinis %": pareto_top["Kumuliacinis %"].to_numpy()
+    })
+    y = {"field": "Siuntėjas", "type": "nominal", "sort": None}
+    tooltip = [
+        {"field": "Pilnas pavadinimas", "type": "nominal", "title": "Siuntėjas"},
+        {"field": "Klaidų skaičius", "type": "quantitative"},
+        {"field": "Kumuliacinis %", "type": "quantitative"}
+    ]
+    # Dvi x ašys (kaip ax1.twiny()): apačioje klaidų skaičius, viršuje kumuliacinis %
+    # su 80 % riba. Linija ir riba viename sluoksnyje, kad turėtų bendrą skalę.
+    spec = {
+        "title": "Pareto analizė – TOP siuntėjai",
+        "height": 420,
+        "layer": [
+            {
+                "mark": "bar",
+                "encoding": {
+                    "y": y,
+                    "x": {"field": "Klaidų skaičius", "type": "quantitative", "title": "Klaidų skaičius"},
+                    "tooltip": tooltip
+                }
+            },
+            {
+                "layer": [
+                    {
+                        "mark": {"type": "line", "point": True, "color": "red", "strokeWidth": 2},
+                        "encoding": {
+                            "y": y,
+                            "x": {
+                                "field": "Kumuliacinis %", "type": "quantitative",
+                                "scale": {"domain": [0, 110]},
+                                "axis": {"orient": "top"}, "title": "Kumuliacinis %"
+                            },
+                            "tooltip": tooltip
+                        }
+                    },
+                    {
+                        "mark": {"type": "rule", "color": "gray", "strokeDash": [4, 4]},
+                        "encoding": {"x": {"datum": 80, "type": "quantitative"}}
+                    }
+                ]
+            }
+        ],
+        "resolve": {"scale": {"x": "independent"}}
+    }
+    return data, spec
+
+
+GRAFIKAI = {
+    "menesiai": draw_months,
+    "priezastys": draw_reasons,
+    "siuntejai_kiekis": draw_sender_count,
+    "siuntejai_proc": draw_sender_proc,
+    "uzsakovai": draw_customers,
+    "pareto": draw_pareto
+}
+
+
+VEGA_GRAFIKAI = {
+    "menesiai": vega_months,
+    "priezastys": vega_reasons,
+    "siuntejai_kiekis": vega_sender_count,
+    "siuntejai_proc": vega_sender_proc,
+    "uzsakovai": vega_customers,
+    "pareto": vega_pareto
+}
+
+
+def table_hash(table):
+    digest = hashlib.sha256(pd.util.hash_pandas_object(table, index=True).to_numpy().tobytes())
+    digest.update(repr(list(table.columns)).encode())
+    return digest.hexdigest()
+
+
+def render_png(name, table, dpi=GRAFIKU_DPI):
+    # Figūra uždaroma iš karto, lieka tik PNG baitai
+    fig = GRAFIKAI[name](table)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", bbox_inches="tight", dpi=dpi)
+    finally:
+        pyplot().close(fig)
+    return buffer.getvalue()
+
+
+def chart_tables(rezultatai):
+    # Lentelės, iš kurių piešiami grafikai (tos pačios skydelyje ir eksporte)
+    tables = {
+        "menesiai": rezultatai["summary"][["Mėnuo", "Sąskaitų_procentas", "Klaidų_procentas"]]
+    }
+    # Skydelyje dar neatidarytų skilčių lentelių rezultatuose gali nebūti
+    if rezultatai["klaidos"].empty:
+        return tables
+    if "priezastys" in rezultatai:
+        tables["priezastys"] = rezultatai["priezastys"]
+    if "siuntejai_stats" in rezultatai:
+        tables["siuntejai_kiekis"] = rezultatai["siuntejai_stats"].head(10)
+        if not rezultatai["siuntejai_proc"].empty:
+            tables["siuntejai_proc"] = rezultatai["siuntejai_proc"].head(10)
+        tables["pareto"] = rezultatai["pareto"].head(10)
+    if "uzsakovai_stats" in rezultatai:
+        tables["uzsakovai"] = rezultatai["uzsakovai_stats"].head(10)
+    return tables
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+from duomenys import encode_categories, invoice_text
+
+# Saugoma tik tai, ko reikia kubui ir klaidų sąrašui; Klientas nebereikalingas,
+# nes mėnuo ir metai iš jo jau išskirti
+ISTORIJOS_STULPELIAI = [
+    "Metai", "Mėnuo", "Užsakovas", "Sąskaitos faktūros Nr.", "Siuntėjas",
+    "Klaidos_priežastis", "Klaidos", "Yra klaida"
+]
+SASKAITOS_STULPELIS = "Sąskaitos faktūros Nr."
+
+
+def month_label(metai, menuo):
+    # Istorijoje mėnuo su metais, pvz., "2025 Sausis"; metų nenustačius – tik mėnuo
+    return str(menuo) if pd.isna(metai) else f"{metai} {menuo}"
+
+
+class HistoryStore:
+    # Įkeltų failų istorija Parquet formatu: <katalogas>/<metai mėnuo>/<failų maišas>.parquet.
+    # Tas pats failų rinkinys įrašomas tik kartą, o sąskaitos, jau esančios istorijoje,
+    # neįrašomos dar kartą – kaip ir keliuose failuose, paliekama pirmą kartą įkelta.
+    # Įkėlimas laikomas įrašytu tik tada, kai yra jo žymės failas <katalogas>/<maišas>.irasyta.
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def files(self):
+        # Tik iki galo įrašytų įkėlimų failai
+        hashes = self.file_hashes()
+        if not hashes:
+            return []
+        return sorted(
+            os.path.join(entry.path, name)
+            for entry in os.scandir(self.path) if entry.is_dir()
+            for name in os.listdir(entry.path)
+            if name.endswith(".parquet") and name.removesuffix(".parquet") in hashes
+        )
+
+    def file_hashes(self):
+        if not os.path.isdir(self.path):
+            return set()
+        return {name.removesuffix(".irasyta") for name in os.listdir(self.path) if name.endswith(".irasyta")}
+
+    def marker(self, file_hash):
+        return os.path.join(self.path, f"{file_hash}.irasyta")
+
+    def remove_unfinished(self, file_hash):
+        # Nepavykusio ar nutraukto įrašymo failai visuose mėnesiuose
+        if not os.path.isdir(self.path):
+            return
+        for entry in os.scandir(self.path):
+            if entry.is_dir():
+                for name in (f"{file_hash}.parquet", f"{file_hash}.parquet.tmp"):
+                    path = os.path.join(entry.path, name)
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def version(self):
+        # Pasikeičia tik pridėjus naujų duomenų – naudojamas kaip podėlio raktas
+        digest = hashlib.sha256()
+        for path in self.files():
+            digest.update(os.path.relpath(path, self.path).encode("utf-8"))
+        return digest.hexdigest()
+
+    def invoices(self):
+        # Skaitomas tik sąskaitos numerio stulpelis
+        frames = [pd.read_parquet(path, columns=[SASKAITOS_STULPELIS]) for path in self.files()]
+        if not frames:
+            return pd.Index([])
+        return pd.Index(pd.concat(frames, ignore_index=True)[SASKAITOS_STULPELIS].dropna().unique())
+
+    def append(self, file_hash, df):
+        # Grąžina (įrašytos eilutės, praleistos jau istorijoje esančių sąskaitų eilutės)
+        with self.lock:
+            if file_hash in self.file_hashes():
+                return 0, 0
+
+            invoice = invoice_text(df[SASKAITOS_STULPELIS])
+            duplicate = invoice.notna().to_numpy() & invoice.isin(self.invoices()).to_numpy()
+            new = df.loc[~duplicate, ISTORIJOS_STULPELIAI].assign(**{SASKAITOS_STULPELIS: invoice[~duplicate]})
+
+            self.remove_unfinished(file_hash)
+            paths = []
+            try:
+                for (metai, menuo), part in new.groupby(["Metai", "Mėnuo"], observed=True, sort=False, dropna=False):
+                    part = part.reset_index(drop=True)
+                    for col in part.select_dtypes("category"):
+                        part[col] = part[col].cat.remove_unused_categories()
+
+                    katalogas = os.path.join(self.path, month_label(metai, menuo))
+                    os.makedirs(katalogas, exist_ok=True)
+                    path = os.path.join(katalogas, f"{file_hash}.parquet")
+                    paths.append(path)
+                    part.to_parquet(path + ".tmp", index=False)
+
+                # Pervadinama tik įrašius visus mėnesius, o žymė rašoma paskutinė, todėl
+                # nepavykus istorijoje nelieka pusės įkėlimo ir jį galima įrašyti iš naujo
+                for path in paths:
+                    os.replace(path + ".tmp", path)
+                os.makedirs(self.path, exist_ok=True)
+                open(self.marker(file_hash), "w").close()
+            except Exception:
+                self.remove_unfinished(file_hash)
+                raise
+            return len(new), int(duplicate.sum())
+
+    def load(self):
+        # Visa istorija su tomis pačiomis kategorijomis kaip ką tik įkeltas failas.
+        # Mėnuo rodomas su metais, kad skirtingų metų ir įkėlimų sausiai nesusilietų.
+        frames = [pd.read_parquet(path) for path in self.files()]
+        if not frames:
+            return None
+        df = pd.concat(frames, ignore_index=True).reindex(columns=ISTORIJOS_STULPELIAI)
+        for col in ["Metai", "Mėnuo", "Siuntėjas", "Užsakovas", "Klaidos_priežastis", "Klaidos"]:
+            df[col] = df[col].astype(object)
+        df["Mėnuo"] = df["Mėnuo"].where(df["Metai"].isna(), df["Metai"] + " " + df["Mėnuo"])
+        return encode_categories(df)
@@ -1,20 +1,43 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
-import re
-import io
 import os
-import textwrap
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.drawing.image import Image as ExcelImage
-import openai
+import functools
+import sys
+import threading
+import uuid
+from collections import OrderedDict, defaultdict
 
-# OpenAI klientas
-client = openai.OpenAI(api_key=st.secrets["openai_api_key"])
+from matavimai import MATAVIMAI_IJUNGTI, StageTimer
 
 st.set_page_config(page_title="Klaidų analizės skydelis", layout="wide")
 
+# Kiek skirtingų paruoštų failų laikoma atmintyje (bendra visoms sesijoms, LRU)
+FAILU_PODELIO_DYDIS = 8
+
+# Filtrų kombinacijų rezultatų podėlio atminties biudžetas (MB)
+REZULTATU_PODELIO_MB = int(os.environ.get("KLAIDU_REZULTATU_PODELIS_MB", "256"))
+
+# Kiek iš šio biudžeto gali užimti vienos sesijos rezultatai ir ataskaitos (MB)
+SESIJOS_PODELIO_MB = int(os.environ.get("KLAIDU_SESIJOS_PODELIS_MB", "64"))
+
+# Kiek sugeneruotų grafikų (PNG) laikoma podėlyje
+GRAFIKU_PODELIO_DYDIS = 128
+
+# Skydelio grafikai: "vega" – piešiami naršyklėje, "png" – matplotlib serveryje.
+# Excel ataskaitoje grafikai visada PNG.
+GRAFIKU_VARIKLIS = os.environ.get("KLAIDU_GRAFIKAI", "vega")
+
+# Įkeltų failų istorijos katalogas (tuščias – istorija nesaugoma)
+ISTORIJOS_KATALOGAS = os.environ.get("KLAIDU_ISTORIJA", ".klaidu_istorija")
+
+# Analizės variklis: "pandas" arba "polars" (daugiagijis, reikia įdiegti polars)
+ANALIZES_VARIKLIS = os.environ.get("KLAIDU_VARIKLIS", "pandas")
+
+# Klaidų sąrašo puslapio dydžiai; naršyklei siunčiamas tik rodomas puslapis
+KLAIDU_PUSLAPIO_DYDZIAI = [50, 100, 250, 500]
+
+# Etapų matavimai (šoninės juostos skydelis ir žurnalo eilutės)
+matavimai = StageTimer(MATAVIMAI_IJUNGTI or st.query_params.get("debug") == "1")
+
 # ----------------------------
 # STILIUS
 # ----------------------------
@@ -57,104 +80,466 @@ div[data-testid="stDataFrame"] {
 st.title("📊 Klaidų analizės dashboard")
 st.caption("Analizėje naudojama: **Klaidos priežastis** iš **O** stulpelio ir **Klaidos** iš **P** stulpelio.")
 
-uploaded_file = st.file_uploader("📎 Pasirinkite Excel failą", type=["xlsx"])
+uploaded_files = st.file_uploader("📎 Pasirinkite Excel failus", type=["xlsx"], accept_multiple_files=True)
+
+# Istorija analizuojama be pradinių xlsx failų; jungiklis rodomas, kai ji jau yra
+rodyti_istorija = bool(ISTORIJOS_KATALOGAS) and os.path.isdir(ISTORIJOS_KATALOGAS) and st.sidebar.toggle(
+    "🗂️ Analizuoti visą istoriją",
+    help="Visi anksčiau įkelti failai; pasikartojančios sąskaitos įtrauktos tik kartą."
+)
 
 
 # ----------------------------
-# PAGALBINĖS FUNKCIJOS
+# GRAFIKAI
 # ----------------------------
-def extract_month(text):
-    if isinstance(text, str):
-        match = re.search(
-            r"\b(KOVAS|VASARIS|SAUSIS|BALANDIS|GEGUŽĖ|BIRŽELIS|LIEPA|RUGPJŪTIS|RUGSĖJIS|SPALIS|LAPKRITIS|GRUODIS)\b",
-            text.upper()
-        )
-        if match:
-            return match.group(1).capitalize()
-    return "Nežinoma"
-
-
-def clean_text(value):
-    if pd.isna(value):
-        return None
-    text = str(value).strip()
-    return text if text else None
-
-
-def generate_insight(row):
-    klaidos = row["Su_klaidomis"]
-    procentas = row["Klaidų_procentas"]
-    saskaitu = row["Sąskaitų_skaičius"]
-    menuo = row["Mėnuo"]
-
-    if klaidos == 0:
-        return f"✅ {menuo}: jokių klaidų – puikus rezultatas."
-    elif saskaitu < 15 and procentas >= 15:
-        return f"⚠️ {menuo}: nors klaidų tik {klaidos}, jos sudaro {procentas:.2f}% – mažas kiekis padidina procentinę įtaką."
-    elif procentas >= 20:
-        return f"🔴 {menuo}: labai aukštas klaidų procentas ({procentas:.2f}%) – būtina peržiūrėti procesą."
-    elif procentas >= 15:
-        return f"🟠 {menuo}: padidėjęs klaidų procentas ({procentas:.2f}%) – verta ieškoti priežasčių."
-    else:
-        return f"🟢 {menuo}: klaidų lygis ({procentas:.2f}%) yra kontroliuojamas."
+# Grafikas piešiamas tik kartą kiekvienam skirtingam lentelės turiniui,
+# podėlyje lieka tik PNG baitai
+@st.cache_data(max_entries=GRAFIKU_PODELIO_DYDIS, show_spinner=False)
+def render_chart(name, content_hash, _table):
+    return render_png(name, _table)
 
 
-def safe_add_image(ws, image_path, anchor):
-    if os.path.exists(image_path):
-        img = ExcelImage(image_path)
-        img.anchor = anchor
-        ws.add_image(img)
+def chart_png(name, table):
+    with matavimai.stage(f"grafikas: {name}", len(table)):
+        return render_chart(name, table_hash(table), table)
 
 
-def wrap_label(text, width=18):
-    if pd.isna(text):
-        return "Nenurodyta"
-    return "\n".join(textwrap.wrap(str(text), width=width))
+def show_chart(name, table):
+    if GRAFIKU_VARIKLIS == "png":
+        st.image(chart_png(name, table), use_container_width=True)
+        return
+    with matavimai.stage(f"grafikas: {name}", len(table)):
+        data, spec = VEGA_GRAFIKAI[name](table)
+        st.vega_lite_chart(data, spec, use_container_width=True)
 
 
-def ellipsis_label(text, max_len=30):
-    if pd.isna(text):
-        return "Nenurodyta"
-    text = str(text)
-    return text if len(text) <= max_len else text[:max_len - 3] + "..."
+# ----------------------------
+# EXCEL EKSPORTAS
+# ----------------------------
+def report_bytes(rezultatu_podelis, sesija, filtru_raktas, rezultatai, papildyti):
+    # Ataskaita kuriama tik paspaudus atsisiuntimą ir saugoma pagal filtrų būseną
+    raktas = ("ataskaita",) + filtru_raktas
+    data = rezultatu_podelis.get(raktas)
+    if data is None:
+        rezultatai = papildyti(rezultatai, tuple(REZULTATU_GRUPES))
+        with matavimai.stage("eksportas", len(rezultatai["klaidos"])):
+            data = build_report(rezultatai, chart_png)
+        rezultatu_podelis.put(raktas, data, sesija)
+    return data
+
+
+def estimate_size(value, shared=()):
+    # shared – objektai, kurie jau laikomi kitur (pvz., kubo lentelės), neskaičiuojami
+    if any(value is s for s in shared):
+        return 0
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if hasattr(value, "estimated_size"):
+        # Polars lentelės
+        return int(value.estimated_size())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(v, shared) for v in value.values())
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    # LRU podėlis su atminties biudžetu: seniausiai naudoti įrašai išmetami,
+    # kol bendras dydis telpa į biudžetą. Bendras visoms sesijoms, bet kiekvienos
+    # sesijos įrašų dydis skaičiuojamas atskirai: viršijus sesijos biudžetą, išmetami
+    # seniausi tos sesijos įrašai, todėl viena sesija neišstumia kitų rezultatų.
+    def __init__(self, budget_bytes, session_budget_bytes=None):
+        self.budget_bytes = budget_bytes
+        self.session_budget_bytes = session_budget_bytes or budget_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.session_sizes = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, session=None, shared=()):
+        size = estimate_size(value, shared)
+        if size > min(self.budget_bytes, self.session_budget_bytes):
+            return
+        with self.lock:
+            self._evict(key)
+            self.entries[key] = (value, size, session)
+            self.size += size
+            self.session_sizes[session] += size
+            while self.session_sizes[session] > self.session_budget_bytes:
+                self._evict(next(k for k, entry in self.entries.items() if entry[2] == session))
+            while self.size > self.budget_bytes:
+                self._evict(next(iter(self.entries)))
+
+    def _evict(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        _, size, session = entry
+        self.size -= size
+        self.session_sizes[session] -= size
+        if not self.session_sizes[session]:
+            del self.session_sizes[session]
+
+    def session_size(self, session):
+        with self.lock:
+            return self.session_sizes.get(session, 0)
+
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(REZULTATU_PODELIO_MB * 1024 * 1024, SESIJOS_PODELIO_MB * 1024 * 1024)
+
+
+@st.cache_resource
+def get_ai_cache():
+    return ResponseCache()
+
+
+# OpenAI klientas kuriamas tik pirmą kartą jo prireikus, vienas visam procesui
+# (KLAIDU_AI_KLIENTAS=stub – bandomasis klientas, API nekviečiamas)
+@st.cache_resource
+def get_ai_client():
+    if os.environ.get("KLAIDU_AI_KLIENTAS") == "stub":
+        return StubClient()
+    import openai
+    return openai.OpenAI(api_key=st.secrets["openai_api_key"])
+
+
+def filter_key(file_hash, menesiai, siuntejai, uzsakovai, tik_klaidos):
+    return (file_hash, tuple(sorted(menesiai)), tuple(sorted(siuntejai)), tuple(sorted(uzsakovai)), bool(tik_klaidos))
+
+
+# Procesų telkinys failams nuskaityti – vienas visam serveriui
+@st.cache_resource
+def get_process_pool():
+    return process_pool()
+
+
+# Failai nuskaitomi ir paruošiami tik vieną kartą pagal turinio maišą.
+# Grąžinamas bendras (nekopijuojamas) objektas, todėl jo keisti negalima.
+@st.cache_resource(max_entries=FAILU_PODELIO_DYDIS, show_spinner="Apdorojami failai...")
+def load_data(file_hash, _files):
+    executor = get_process_pool() if len(_files) > 1 else None
+    return load_workbooks(_files, executor)
+
+
+@st.cache_resource
+def get_history_store():
+    return HistoryStore(ISTORIJOS_KATALOGAS)
+
+
+# Tas pats failų rinkinys į istoriją įrašomas tik kartą
+@st.cache_resource(max_entries=FAILU_PODELIO_DYDIS, show_spinner="Įrašoma į istoriją...")
+def save_to_history(file_hash, _df):
+    if not isinstance(_df, pd.DataFrame):
+        _df = _df.to_pandas()
+    return get_history_store().append(file_hash, _df)
+
+
+# Istorija perskaitoma tik pasikeitus jos versijai (įrašius naują failą)
+@st.cache_resource(max_entries=1, show_spinner="Skaitoma istorija...")
+def load_history(versija):
+    df = get_history_store().load()
+    if df is not None and ANALIZES_VARIKLIS == "polars":
+        df = from_pandas(df)
+    return df
+
+
+# Kubas skaičiuojamas vieną kartą kiekvienam failui
+@st.cache_resource(max_entries=FAILU_PODELIO_DYDIS, show_spinner="Skaičiuojama suvestinė...")
+def load_cube(file_hash, _df):
+    return build_cube(_df)
+
+
+def section_results(rezultatu_podelis, sesija, filtru_raktas, filtrai, df, rezultatai, grupes):
+    # Skilčių lentelės skaičiuojamos tik tada, kai jų prireikia, ir kiekviena
+    # grupė saugoma podėlyje atskirai, todėl grįžus į skiltį neperskaičiuojama
+    rezultatai = dict(rezultatai)
+    trukstamos = []
+    for grupe in grupes:
+        lenteles = rezultatu_podelis.get(("lenteles", grupe) + filtru_raktas)
+        if lenteles is None:
+            trukstamos.append(grupe)
+        else:
+            rezultatai.update(lenteles)
+    if not trukstamos:
+        return rezultatai
 
+    cube = load_cube(filtru_raktas[0], df)
+    with matavimai.stage("skilčių lentelės", len(cube["langeliai"])):
+        naujos = build_results(aggregate_cube(cube, *filtrai, grupes=trukstamos))
+    for grupe in trukstamos:
+        lenteles = {key: naujos[key] for key in REZULTATU_GRUPES[grupe]}
+        rezultatu_podelis.put(("lenteles", grupe) + filtru_raktas, lenteles, sesija)
+        rezultatai.update(lenteles)
+    return rezultatai
 
-if uploaded_file:
-    df = pd.read_excel(uploaded_file)
 
-    # ----------------------------
-    # PRIVALOMŲ STULPELIŲ PATIKRA
-    # ----------------------------
-    required_named_columns = ["Klientas", "Užsakovas", "Sąskaitos faktūros Nr.", "Siuntėjas"]
-    missing_named = [col for col in required_named_columns if col not in df.columns]
+# ----------------------------
+# SKILTYS
+# ----------------------------
+def show_summary(rezultatai, grafiku_lenteles):
+    summary = rezultatai["summary"]
 
-    if missing_named:
-        st.error(f"Faile trūksta šių stulpelių: {', '.join(missing_named)}")
-        st.stop()
+    left, right = st.columns([1.15, 1])
 
-    if df.shape[1] < 16:
-        st.error("Faile nepakanka stulpelių. Reikia bent 16 stulpelių, kad būtų galima paimti O ir P.")
-        st.stop()
+    with left:
+        st.subheader("📋 Suvestinė pagal mėnesius")
+        st.dataframe(summary, use_container_width=True, height=420)
 
-    # ----------------------------
-    # DUOMENŲ PARUOŠIMAS
-    # ----------------------------
-    df["Klaidos_priežastis"] = df.iloc[:, 14].apply(clean_text)  # O
-    df["Klaidos"] = df.iloc[:, 15].apply(clean_text)             # P
-    df["Mėnuo"] = df["Klientas"].apply(extract_month)
-    df["Yra klaida"] = df["Klaidos"].notna()
-
-    menesiu_tvarka = [
-        "Sausis", "Vasaris", "Kovas", "Balandis", "Gegužė", "Birželis",
-        "Liepa", "Rugpjūtis", "Rugsėjis", "Spalis", "Lapkritis", "Gruodis"
-    ]
-
-    visi_menesiai = sorted(
-        df["Mėnuo"].dropna().unique(),
-        key=lambda x: menesiu_tvarka.index(x) if x in menesiu_tvarka else 99
+    with right:
+        st.subheader("📈 Normalizuotas palyginimas")
+        show_chart("menesiai", grafiku_lenteles["menesiai"])
+
+    st.subheader("🔎 Įžvalgos pagal mėnesius")
+    st.dataframe(
+        summary[[
+            "Mėnuo",
+            "Klaidų_procentas",
+            "Sąskaitų_skaičius",
+            "Sąskaitų_procentas",
+            "Su_klaidomis",
+            "Įžvalga"
+        ]],
+        use_container_width=True
+    )
+
+
+def show_reasons(rezultatai, grafiku_lenteles):
+    st.subheader("📌 Klaidos pagal priežastį")
+    c1, c2 = st.columns(2)
+
+    with c1:
+        st.dataframe(rezultatai["priezastys"], use_container_width=True, height=320)
+
+    with c2:
+        show_chart("priezastys", grafiku_lenteles["priezastys"])
+
+
+def show_senders(rezultatai, grafiku_lenteles):
+    siuntejai_proc = rezultatai["siuntejai_proc"]
+
+    c1, c2 = st.columns(2)
+
+    with c1:
+        st.subheader("📨 TOP siuntėjai pagal klaidų kiekį")
+        st.dataframe(rezultatai["siuntejai_stats"], use_container_width=True, height=320)
+
+        show_chart("siuntejai_kiekis", grafiku_lenteles["siuntejai_kiekis"])
+
+    with c2:
+        st.subheader("📊 Siuntėjų kokybė pagal klaidų procentą")
+
+        st.caption("Rodomi siuntėjai, kurie turi bent 3 dokumentus, kad procentas nebūtų klaidinantis.")
+        st.dataframe(siuntejai_proc, use_container_width=True, height=320)
+
+        if not siuntejai_proc.empty:
+            show_chart("siuntejai_proc", grafiku_lenteles["siuntejai_proc"])
+        else:
+            st.info("Nėra pakankamai siuntėjų su bent 3 dokumentais procentinei analizei.")
+
+
+def show_customers(rezultatai, grafiku_lenteles):
+    st.subheader("🏢 TOP užsakovai su klaidomis")
+    c1, c2 = st.columns(2)
+
+    with c1:
+        st.dataframe(rezultatai["uzsakovai_stats"], use_container_width=True, height=320)
+
+    with c2:
+        show_chart("uzsakovai", grafiku_lenteles["uzsakovai"])
+
+
+def show_pareto(rezultatai, grafiku_lenteles):
+    st.subheader("📊 Pareto analizė pagal siuntėją")
+
+    show_chart("pareto", grafiku_lenteles["pareto"])
+
+
+def show_error_list(rezultatai, grafiku_lenteles):
+    klaidos = rezultatai["klaidos"]
+
+    st.subheader("📝 Klaidų sąrašas")
+    paieskos_col, dydzio_col = st.columns([4, 1])
+    uzklausa = paieskos_col.text_input(
+        "🔍 Paieška",
+        key="klaidu_paieska",
+        placeholder="Klaida, priežastis, siuntėjas ar užsakovas"
     )
-    visi_siuntejai = sorted(df["Siuntėjas"].dropna().astype(str).unique().tolist())
-    visi_uzsakovai = sorted(df["Užsakovas"].dropna().astype(str).unique().tolist())
+    puslapio_dydis = dydzio_col.selectbox("Eilučių puslapyje", KLAIDU_PUSLAPIO_DYDZIAI, key="klaidu_puslapio_dydis")
+
+    with matavimai.stage("klaidų paieška", len(klaidos)):
+        mask = rezultatai["klaidu_indeksas"].match(klaidos, uzklausa)
+        eilutes = np.flatnonzero(mask) if mask is not None else None
+    rasta = len(eilutes) if eilutes is not None else len(klaidos)
+
+    if rasta == 0:
+        # Be paieškos tuščias sąrašas rodomas kaip anksčiau – tuščia lentele
+        if mask is not None:
+            st.info("Pagal paieškos užklausą įrašų nerasta.")
+        else:
+            st.dataframe(klaidos.reset_index(drop=True), use_container_width=True, height=420)
+        return
+
+    # Puslapio laukas be rakto: pasikeitus rezultatų skaičiui grįžtama į pirmą puslapį
+    puslapiu = (rasta - 1) // puslapio_dydis + 1
+    puslapis = st.number_input("Puslapis", min_value=1, max_value=puslapiu, value=1, step=1)
+    pradzia = (puslapis - 1) * puslapio_dydis
+    pabaiga = min(pradzia + puslapio_dydis, rasta)
+    st.caption(f"Rasta {rasta} įrašų, rodomi {pradzia + 1}–{pabaiga} (puslapis {puslapis} iš {puslapiu}).")
+
+    with matavimai.stage("klaidų sąrašas", pabaiga - pradzia):
+        if eilutes is None:
+            puslapio_lentele = klaidos.iloc[pradzia:pabaiga]
+        else:
+            puslapio_lentele = klaidos.iloc[eilutes[pradzia:pabaiga]]
+        st.dataframe(puslapio_lentele.reset_index(drop=True), use_container_width=True, height=420)
+
+
+def show_ai_analysis(rezultatai, grafiku_lenteles):
+    st.subheader("🤖 Dirbtinio intelekto analizė")
+
+    # AI analizė kviečiama tik paspaudus mygtuką; atsakymai saugomi podėlyje diske,
+    # todėl tiems patiems duomenims rodomi iš karto be naujos užklausos
+    analysis_prompt = build_prompt(rezultatai)
+    ai_podelis = get_ai_cache()
+    ai_raktas = analysis_key(analysis_prompt, AI_MODELIS, AI_TEMPERATURA)
+
+    ai_srautas = st.session_state.get("ai_srautas")
+    analize = ai_podelis.get(ai_raktas)
+
+    mygtuko_vieta = st.empty()
+    if analize is None and ai_srautas is None and mygtuko_vieta.button("🤖 Generuoti AI analizę"):
+        mygtuko_vieta.empty()
+        try:
+            ai_srautas = AnalysisStream(get_ai_client(), analysis_prompt, ai_podelis)
+        except Exception as e:
+            st.warning("Nepavyko gauti AI analizės. Patikrink API raktą Streamlit `secrets` nustatymuose.")
+            st.error(str(e))
+        else:
+            st.session_state["ai_srautas"] = ai_srautas
+            st.session_state["ai_srauto_filtrai"] = st.session_state["filtru_raktas"]
+
+    if analize is not None:
+        st.markdown(analize)
+    elif ai_srautas is not None:
+        # Atsakymas rodomas srautu: tekstas atsiranda, kai tik gaunami pirmi žodžiai
+        try:
+            with matavimai.stage("AI analizė"):
+                st.write_stream(ai_srautas.chunks())
+        except Exception as e:
+            st.warning("Nepavyko gauti AI analizės. Patikrink API raktą Streamlit `secrets` nustatymuose.")
+            st.error(str(e))
+        if ai_srautas.first_token_s is not None:
+            matavimai.record("AI pirmas atsakymo žodis", ai_srautas.first_token_s)
+        del st.session_state["ai_srautas"]
+
+
+# Skiltis, jos funkcija, ar jai reikia klaidų ir kurių lentelių grupių (analize.REZULTATU_GRUPES)
+SKILTYS = {
+    "📋 Suvestinė": (show_summary, False, ()),
+    "📌 Priežastys": (show_reasons, True, ("priezastys",)),
+    "📨 Siuntėjai": (show_senders, True, ("siuntejai",)),
+    "🏢 Užsakovai": (show_customers, True, ("uzsakovai",)),
+    "📊 Pareto": (show_pareto, True, ("siuntejai",)),
+    "📝 Klaidų sąrašas": (show_error_list, False, ()),
+    "🤖 AI analizė": (show_ai_analysis, False, ("priezastys", "siuntejai", "uzsakovai")),
+}
+
+
+# Skaičiuojama ir piešiama tik pasirinkta skiltis. Skilties perjungimas ir
+# veiksmai joje (pvz., AI mygtukas) perkrauna tik šį fragmentą, ne visą puslapį.
+@st.fragment
+def show_sections(rezultatai, papildyti):
+    skiltis = st.segmented_control(
+        "Skiltis",
+        list(SKILTYS),
+        default=next(iter(SKILTYS)),
+        required=True,
+        key="skiltis",
+        label_visibility="collapsed"
+    )
+    show, reikia_klaidu, grupes = SKILTYS[skiltis]
+
+    if reikia_klaidu and rezultatai["klaidos"].empty:
+        st.info("Pagal pasirinktus filtrus klaidų nėra.")
+        return
+
+    rezultatai = papildyti(rezultatai, grupes)
+    show(rezultatai, chart_tables(rezultatai))
+
+
+if uploaded_files or rodyti_istorija:
+    # Duomenų bibliotekos (pandas ir kt.) įkeliamos tik įkėlus failą, todėl įkėlimo
+    # laukas parodomas iš karto. matplotlib, openpyxl ir openai įkeliami dar vėliau –
+    # kai pirmą kartą piešiamas grafikas, kuriama ataskaita ar kviečiamas AI.
+    import numpy as np
+    import pandas as pd
+    from analize import REZULTATU_GRUPES, build_results
+    from ataskaita import build_report
+    from duomenys import process_pool, workbook_key
+    from grafikai import VEGA_GRAFIKAI, chart_tables, render_png, table_hash
+    from istorija import HistoryStore
+    from ai_analize import (
+        AI_MODELIS, AI_TEMPERATURA, AnalysisStream, ResponseCache, StubClient,
+        analysis_key, build_prompt
+    )
+    if ANALIZES_VARIKLIS == "polars":
+        # Paruošimas, kubas ir agregavimas Polars užklausomis; į pandas verčiamos
+        # tik rodomos lentelės, todėl skiltys, eksportas ir AI nesikeičia
+        from polars_analize import aggregate_cube, build_cube, default_filters, from_pandas, load_workbooks
+    else:
+        from analize import aggregate_cube, build_cube, default_filters
+        from duomenys import load_workbooks
+
+    if uploaded_files:
+        files = [(f.name, f.getvalue()) for f in uploaded_files]
+        file_hash = workbook_key(files)
+        matavimai.context["failai"] = file_hash[:12]
+
+        try:
+            with matavimai.stage("nuskaitymas ir paruošimas") as etapas:
+                df, pasikartojancios = load_data(file_hash, files)
+                etapas["eilutes"] = len(df)
+        except ValueError as e:
+            st.error(str(e))
+            st.stop()
+
+        if len(files) > 1:
+            st.caption(f"Įkelta failų: {len(files)}. Pašalinta kituose failuose pasikartojančių sąskaitų eilučių: {pasikartojancios}.")
+
+        if ISTORIJOS_KATALOGAS:
+            # Nepavykęs įrašymas į istoriją netrukdo analizuoti įkelto failo
+            try:
+                with matavimai.stage("įrašymas į istoriją", len(df)):
+                    irasyta, jau_istorijoje = save_to_history(file_hash, df)
+            except Exception as e:
+                st.warning(f"Nepavyko įrašyti į istoriją: {e}")
+            else:
+                if jau_istorijoje:
+                    st.caption(f"Į istoriją neįrašyta jau anksčiau įkeltų sąskaitų eilučių: {jau_istorijoje}.")
+
+    if rodyti_istorija:
+        # Istorijos versija naudojama vietoje failų maišo kubo ir rezultatų podėliuose
+        file_hash = "istorija-" + get_history_store().version()
+        with matavimai.stage("istorijos skaitymas") as etapas:
+            df = load_history(file_hash)
+            etapas["eilutes"] = len(df) if df is not None else 0
+        if df is None:
+            st.info("Istorijoje dar nėra duomenų.")
+            st.stop()
+        st.caption(f"Analizuojama visa istorija: {len(df)} eilučių.")
+
+    visi_menesiai, visi_siuntejai, visi_uzsakovai = default_filters(df)
 
     # ----------------------------
     # FILTRAI
@@ -181,62 +566,35 @@ if uploaded_file:
 
     rodyti_tik_klaidas = st.sidebar.checkbox("Rodyti tik įrašus su klaidomis", value=False)
 
-    df_filtered = df[
-        (df["Mėnuo"].isin(pasirinkti_menesiai)) &
-        (df["Siuntėjas"].astype(str).isin(pasirinkti_siuntejai)) &
-        (df["Užsakovas"].astype(str).isin(pasirinkti_uzsakovai))
-    ].copy()
-
-    if rodyti_tik_klaidas:
-        df_filtered = df_filtered[df_filtered["Yra klaida"] == True].copy()
-
-    if df_filtered.empty:
+    # Visos lentelės ir KPI gaunamos iš kubo pjūvio, o ne iš eilučių.
+    # Jau matytos filtrų kombinacijos paimamos iš rezultatų podėlio. Čia skaičiuojami
+    # tik KPI, suvestinė ir klaidų sąrašas; skilčių lentelės – atidarius skiltį.
+    rezultatu_podelis = get_result_cache()
+    sesija = st.session_state.setdefault("sesijos_id", uuid.uuid4().hex)
+    filtrai = (pasirinkti_menesiai, pasirinkti_siuntejai, pasirinkti_uzsakovai, rodyti_tik_klaidas)
+    filtru_raktas = filter_key(file_hash, *filtrai)
+    papildyti = functools.partial(section_results, rezultatu_podelis, sesija, filtru_raktas, filtrai, df)
+    rezultatai = rezultatu_podelis.get(filtru_raktas)
+
+    if rezultatai is None:
+        with matavimai.stage("kubas", len(df)):
+            cube = load_cube(file_hash, df)
+        with matavimai.stage("agregavimas", len(cube["langeliai"])):
+            agregatai = aggregate_cube(cube, *filtrai, grupes=())
+            rezultatai = build_results(agregatai)
+        rezultatu_podelis.put(filtru_raktas, rezultatai, sesija, shared=cube.values())
+
+    if rezultatai["summary"].empty:
         st.warning("Pagal pasirinktus filtrus duomenų nerasta.")
         st.stop()
 
-    # ----------------------------
-    # SUVESTINĖ PAGAL MĖNESIUS
-    # ----------------------------
-    summary = df_filtered.groupby("Mėnuo").agg(
-        Sąskaitų_skaičius=("Sąskaitos faktūros Nr.", "nunique"),
-        Su_klaidomis=("Yra klaida", "sum")
-    ).reset_index()
-
-    summary["Klaidų_procentas"] = (
-        summary["Su_klaidomis"] / summary["Sąskaitų_skaičius"] * 100
-    ).round(2)
-
-    summary["Mėnesio_nr"] = summary["Mėnuo"].apply(
-        lambda x: menesiu_tvarka.index(x) if x in menesiu_tvarka else -1
-    )
-    summary = summary.sort_values("Mėnesio_nr").drop(columns="Mėnesio_nr")
-
-    max_skaicius = summary["Sąskaitų_skaičius"].max() if not summary.empty else 1
-    summary["Sąskaitų_procentas"] = (
-        summary["Sąskaitų_skaičius"] / max_skaicius * 100
-    ).round(2)
-
-    summary["Įžvalga"] = summary.apply(generate_insight, axis=1)
-
-    # ----------------------------
-    # KLAIDŲ SĄRAŠAS
-    # ----------------------------
-    klaidos = df_filtered[df_filtered["Yra klaida"] == True][[
-        "Mėnuo",
-        "Užsakovas",
-        "Sąskaitos faktūros Nr.",
-        "Klaidos_priežastis",
-        "Klaidos",
-        "Siuntėjas"
-    ]].copy()
-
     # ----------------------------
     # KPI
     # ----------------------------
-    viso_dokumentu = int(df_filtered["Sąskaitos faktūros Nr."].nunique())
-    viso_klaidu = int(df_filtered["Yra klaida"].sum())
-    klaidu_proc = round((viso_klaidu / viso_dokumentu * 100), 2) if viso_dokumentu else 0.0
-    be_klaidu = viso_dokumentu - viso_klaidu
+    viso_dokumentu = rezultatai["viso_dokumentu"]
+    viso_klaidu = rezultatai["viso_klaidu"]
+    klaidu_proc = rezultatai["klaidu_proc"]
+    be_klaidu = rezultatai["be_klaidu"]
 
     k1, k2, k3, k4 = st.columns(4)
 
@@ -272,352 +630,38 @@ if uploaded_file:
         </div>
         """, unsafe_allow_html=True)
 
-    # ----------------------------
-    # 1 EILĖ: MĖNESIŲ SUVESTINĖ + GRAFIKAS
-    # ----------------------------
-    left, right = st.columns([1.15, 1])
+    # Pasikeitus filtrams, vykdoma AI užklausa atšaukiama
+    st.session_state["filtru_raktas"] = filtru_raktas
+    ai_srautas = st.session_state.get("ai_srautas")
+    if ai_srautas is not None and st.session_state.get("ai_srauto_filtrai") != filtru_raktas:
+        ai_srautas.cancel()
+        del st.session_state["ai_srautas"]
 
-    with left:
-        st.subheader("📋 Suvestinė pagal mėnesius")
-        st.dataframe(summary, use_container_width=True, height=420)
-
-    with right:
-        st.subheader("📈 Normalizuotas palyginimas")
-        fig_months, ax_months = plt.subplots(figsize=(9, 5.5))
-        ax_months.plot(
-            summary["Mėnuo"],
-            summary["Sąskaitų_procentas"],
-            label="Sąskaitų kiekis (%)",
-            marker="o",
-            linewidth=2
-        )
-        ax_months.plot(
-            summary["Mėnuo"],
-            summary["Klaidų_procentas"],
-            label="Klaidų procentas (%)",
-            marker="o",
-            linewidth=2
-        )
-        ax_months.set_ylabel("Procentai (%)")
-        ax_months.set_xlabel("Mėnuo")
-        ax_months.set_ylim(0, 100)
-        ax_months.legend()
-        ax_months.grid(True, alpha=0.3)
-        plt.title("Sąskaitų kiekis ir klaidų procentas")
-        st.pyplot(fig_months)
-
-    st.subheader("🔎 Įžvalgos pagal mėnesius")
-    st.dataframe(
-        summary[[
-            "Mėnuo",
-            "Klaidų_procentas",
-            "Sąskaitų_skaičius",
-            "Sąskaitų_procentas",
-            "Su_klaidomis",
-            "Įžvalga"
-        ]],
-        use_container_width=True
-    )
-
-    # Iš anksto tuščios lentelės ir grafikai eksportui
-    priezastys = pd.DataFrame(columns=["Klaidos priežastis", "Klaidų skaičius"])
-    siuntejai_stats = pd.DataFrame(columns=["Siuntėjas", "Dokumentų_skaičius", "Klaidų skaičius", "Klaidų_procentas"])
-    uzsakovai_stats = pd.DataFrame(columns=["Užsakovas", "Dokumentų_skaičius", "Klaidų skaičius", "Klaidų_procentas"])
-    pareto = pd.DataFrame(columns=["Siuntėjas", "Dokumentų_skaičius", "Klaidų skaičius", "Klaidų_procentas", "Kumuliacinis %"])
-    siuntejai_proc_export = pd.DataFrame(columns=["Siuntėjas", "Dokumentų_skaičius", "Klaidų skaičius", "Klaidų_procentas"])
-
-    fig_reason = None
-    fig_sender_count = None
-    fig_sender_proc = None
-    fig_customer = None
-    fig_pareto = None
-
-    # ----------------------------
-    # ANALIZĖ, JEI YRA KLAIDŲ
-    # ----------------------------
-    if not klaidos.empty:
-        priezastys = klaidos["Klaidos_priežastis"].fillna("Nenurodyta").value_counts().reset_index()
-        priezastys.columns = ["Klaidos priežastis", "Klaidų skaičius"]
-
-        siuntejai_klaidos = klaidos["Siuntėjas"].fillna("Nenurodyta").value_counts().reset_index()
-        siuntejai_klaidos.columns = ["Siuntėjas", "Klaidų skaičius"]
-
-        siuntejai_visi = df_filtered.groupby("Siuntėjas").agg(
-            Dokumentų_skaičius=("Sąskaitos faktūros Nr.", "count")
-        ).reset_index()
-
-        siuntejai_stats = siuntejai_visi.merge(siuntejai_klaidos, on="Siuntėjas", how="left")
-        siuntejai_stats["Klaidų skaičius"] = siuntejai_stats["Klaidų skaičius"].fillna(0).astype(int)
-        siuntejai_stats["Klaidų_procentas"] = (
-            siuntejai_stats["Klaidų skaičius"] / siuntejai_stats["Dokumentų_skaičius"] * 100
-        ).round(2)
-
-        siuntejai_stats = siuntejai_stats.sort_values(
-            by=["Klaidų skaičius", "Dokumentų_skaičius"],
-            ascending=[False, False]
-        ).reset_index(drop=True)
-
-        uzsakovai_klaidos = klaidos["Užsakovas"].fillna("Nenurodyta").value_counts().reset_index()
-        uzsakovai_klaidos.columns = ["Užsakovas", "Klaidų skaičius"]
-
-        uzsakovai_visi = df_filtered.groupby("Užsakovas").agg(
-            Dokumentų_skaičius=("Sąskaitos faktūros Nr.", "count")
-        ).reset_index()
-
-        uzsakovai_stats = uzsakovai_visi.merge(uzsakovai_klaidos, on="Užsakovas", how="left")
-        uzsakovai_stats["Klaidų skaičius"] = uzsakovai_stats["Klaidų skaičius"].fillna(0).astype(int)
-        uzsakovai_stats["Klaidų_procentas"] = (
-            uzsakovai_stats["Klaidų skaičius"] / uzsakovai_stats["Dokumentų_skaičius"] * 100
-        ).round(2)
-
-        uzsakovai_stats = uzsakovai_stats.sort_values(
-            by=["Klaidų skaičius", "Dokumentų_skaičius"],
-            ascending=[False, False]
-        ).reset_index(drop=True)
-
-        # 2 eilė
-        c1, c2 = st.columns(2)
-
-        with c1:
-            st.subheader("📌 Klaidos pagal priežastį")
-            st.dataframe(priezastys, use_container_width=True, height=320)
-
-            fig_reason, ax_reason = plt.subplots(figsize=(8, 5))
-            ax_reason.barh(priezastys["Klaidos priežastis"], priezastys["Klaidų skaičius"])
-            ax_reason.set_title("Klaidos pagal priežastį")
-            ax_reason.set_xlabel("Klaidų skaičius")
-            ax_reason.invert_yaxis()
-            ax_reason.grid(axis="x", alpha=0.3)
-            st.pyplot(fig_reason)
-
-        with c2:
-            st.subheader("📨 TOP siuntėjai pagal klaidų kiekį")
-            st.dataframe(siuntejai_stats, use_container_width=True, height=320)
-
-            top_siuntejai_count = siuntejai_stats.head(10).copy()
-            top_siuntejai_count["Siuntėjas_short"] = top_siuntejai_count["Siuntėjas"].apply(lambda x: ellipsis_label(x, 32))
-
-            fig_sender_count, ax_sender_count = plt.subplots(figsize=(8, 5))
-            ax_sender_count.barh(top_siuntejai_count["Siuntėjas_short"], top_siuntejai_count["Klaidų skaičius"])
-            ax_sender_count.set_title("TOP siuntėjai pagal klaidų kiekį")
-            ax_sender_count.set_xlabel("Klaidų skaičius")
-            ax_sender_count.invert_yaxis()
-            ax_sender_count.grid(axis="x", alpha=0.3)
-            st.pyplot(fig_sender_count)
-
-        # 3 eilė
-        c3, c4 = st.columns(2)
-
-        with c3:
-            st.subheader("📊 Siuntėjų kokybė pagal klaidų procentą")
-
-            siuntejai_proc = siuntejai_stats[siuntejai_stats["Dokumentų_skaičius"] >= 3].copy()
-            siuntejai_proc = siuntejai_proc.sort_values(
-                by=["Klaidų_procentas", "Klaidų skaičius"],
-                ascending=[False, False]
-            ).reset_index(drop=True)
-
-            siuntejai_proc_export = siuntejai_proc.copy()
-
-            st.caption("Rodomi siuntėjai, kurie turi bent 3 dokumentus, kad procentas nebūtų klaidinantis.")
-            st.dataframe(siuntejai_proc, use_container_width=True, height=320)
-
-            if not siuntejai_proc.empty:
-                top_siuntejai_proc = siuntejai_proc.head(10).copy()
-                top_siuntejai_proc["Siuntėjas_short"] = top_siuntejai_proc["Siuntėjas"].apply(lambda x: ellipsis_label(x, 32))
-
-                fig_sender_proc, ax_sender_proc = plt.subplots(figsize=(8, 5))
-                ax_sender_proc.barh(top_siuntejai_proc["Siuntėjas_short"], top_siuntejai_proc["Klaidų_procentas"])
-                ax_sender_proc.set_title("TOP siuntėjai pagal klaidų procentą")
-                ax_sender_proc.set_xlabel("Klaidų procentas (%)")
-                ax_sender_proc.invert_yaxis()
-                ax_sender_proc.grid(axis="x", alpha=0.3)
-                st.pyplot(fig_sender_proc)
-            else:
-                st.info("Nėra pakankamai siuntėjų su bent 3 dokumentais procentinei analizei.")
-
-        with c4:
-            st.subheader("🏢 TOP užsakovai su klaidomis")
-            st.dataframe(uzsakovai_stats, use_container_width=True, height=320)
-
-            top_uzsakovai = uzsakovai_stats.head(10).copy()
-            top_uzsakovai["Užsakovas_short"] = top_uzsakovai["Užsakovas"].apply(lambda x: ellipsis_label(x, 32))
-
-            fig_customer, ax_customer = plt.subplots(figsize=(8, 5))
-            ax_customer.barh(top_uzsakovai["Užsakovas_short"], top_uzsakovai["Klaidų skaičius"])
-            ax_customer.set_title("TOP užsakovai pagal klaidų kiekį")
-            ax_customer.set_xlabel("Klaidų skaičius")
-            ax_customer.invert_yaxis()
-            ax_customer.grid(axis="x", alpha=0.3)
-            st.pyplot(fig_customer)
-
-        # 4 eilė: pataisytas Pareto
-        st.subheader("📊 Pareto analizė pagal siuntėją")
-
-        pareto = siuntejai_stats.sort_values(by="Klaidų skaičius", ascending=False).copy()
-        pareto["Kumuliacinis %"] = (
-            pareto["Klaidų skaičius"].cumsum() / pareto["Klaidų skaičius"].sum() * 100
-        ).round(2)
-
-        pareto_top = pareto.head(10).copy()
-        pareto_top["Siuntėjas_short"] = pareto_top["Siuntėjas"].apply(lambda x: ellipsis_label(x, 32))
-
-        fig_pareto, ax1 = plt.subplots(figsize=(10, 6.5))
-        ax1.barh(pareto_top["Siuntėjas_short"], pareto_top["Klaidų skaičius"])
-        ax1.set_xlabel("Klaidų skaičius")
-        ax1.set_ylabel("Siuntėjas")
-        ax1.grid(axis="x", alpha=0.3)
-        ax1.invert_yaxis()
-
-        ax2 = ax1.twiny()
-        ax2.plot(
-            pareto_top["Kumuliacinis %"],
-            pareto_top["Siuntėjas_short"],
-            color="red",
-            marker="o",
-            linewidth=2
-        )
-        ax2.set_xlabel("Kumuliacinis %")
-        ax2.set_xlim(0, 110)
-        ax2.axvline(80, color="gray", linestyle="--", linewidth=1)
-
-        plt.title("Pareto analizė – TOP siuntėjai")
-        st.pyplot(fig_pareto)
-
-    else:
-        st.info("Pagal pasirinktus filtrus klaidų nėra.")
-
-    # ----------------------------
-    # KLAIDŲ SĄRAŠAS
-    # ----------------------------
-    st.subheader("📝 Klaidų sąrašas")
-    st.dataframe(klaidos.reset_index(drop=True), use_container_width=True, height=420)
+    show_sections(rezultatai, papildyti)
 
     # ----------------------------
     # EXCEL EKSPORTAS
     # ----------------------------
-    img_months_path = "grafikas_menesiai.png"
-    img_reason_path = "grafikas_priezastys.png"
-    img_sender_count_path = "grafikas_siuntejai_kiekis.png"
-    img_sender_proc_path = "grafikas_siuntejai_proc.png"
-    img_customer_path = "grafikas_uzsakovai.png"
-    img_pareto_path = "grafikas_pareto.png"
-
-    fig_months.savefig(img_months_path, bbox_inches="tight")
-
-    if fig_reason is not None:
-        fig_reason.savefig(img_reason_path, bbox_inches="tight")
-    if fig_sender_count is not None:
-        fig_sender_count.savefig(img_sender_count_path, bbox_inches="tight")
-    if fig_sender_proc is not None:
-        fig_sender_proc.savefig(img_sender_proc_path, bbox_inches="tight")
-    if fig_customer is not None:
-        fig_customer.savefig(img_customer_path, bbox_inches="tight")
-    if fig_pareto is not None:
-        fig_pareto.savefig(img_pareto_path, bbox_inches="tight")
-
-    wb = Workbook()
-
-    ws1 = wb.active
-    ws1.title = "Suvestinė"
-    for r in dataframe_to_rows(summary, index=False, header=True):
-        ws1.append(r)
-    safe_add_image(ws1, img_months_path, "I2")
-
-    ws2 = wb.create_sheet(title="Klaidų sąrašas")
-    for r in dataframe_to_rows(klaidos, index=False, header=True):
-        ws2.append(r)
-
-    ws3 = wb.create_sheet(title="Priežastys")
-    for r in dataframe_to_rows(priezastys, index=False, header=True):
-        ws3.append(r)
-    safe_add_image(ws3, img_reason_path, "D2")
-
-    ws4 = wb.create_sheet(title="Siuntėjai")
-    for r in dataframe_to_rows(siuntejai_stats, index=False, header=True):
-        ws4.append(r)
-    safe_add_image(ws4, img_sender_count_path, "F2")
-
-    ws5 = wb.create_sheet(title="Siuntėjų %")
-    for r in dataframe_to_rows(siuntejai_proc_export, index=False, header=True):
-        ws5.append(r)
-    safe_add_image(ws5, img_sender_proc_path, "F2")
-
-    ws6 = wb.create_sheet(title="Užsakovai")
-    for r in dataframe_to_rows(uzsakovai_stats, index=False, header=True):
-        ws6.append(r)
-    safe_add_image(ws6, img_customer_path, "F2")
-
-    ws7 = wb.create_sheet(title="Pareto")
-    for r in dataframe_to_rows(pareto, index=False, header=True):
-        ws7.append(r)
-    safe_add_image(ws7, img_pareto_path, "F2")
-
-    excel_buffer = io.BytesIO()
-    wb.save(excel_buffer)
-    excel_buffer.seek(0)
-
     st.download_button(
         label="📥 Atsisiųsti Excel ataskaitą su grafikais",
-        data=excel_buffer,
+        data=functools.partial(report_bytes, rezultatu_podelis, sesija, filtru_raktas, rezultatai, papildyti),
         file_name="Klaidu_Ataskaita.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        on_click="ignore"
     )
 
     # ----------------------------
-    # AI ANALIZĖ
+    # NAŠUMO MATAVIMAI
     # ----------------------------
-    st.subheader("🤖 Dirbtinio intelekto analizė")
-
-    try:
-        summary_md = summary.to_markdown(index=False)
-        priezastys_md = priezastys.to_markdown(index=False) if not priezastys.empty else "Nėra klaidų."
-        siuntejai_md = siuntejai_stats.to_markdown(index=False) if not siuntejai_stats.empty else "Nėra duomenų."
-        uzsakovai_md = uzsakovai_stats.to_markdown(index=False) if not uzsakovai_stats.empty else "Nėra duomenų."
-
-        analysis_prompt = f"""
-Analizuok pateiktus duomenis apie sąskaitų skaičių, klaidų procentą, klaidų priežastis, siuntėjus ir užsakovus.
-
-Svarbu:
-- Atskirai įvertink absoliutų klaidų kiekį ir klaidų procentą.
-- Nevertink vien tik pagal klaidų kiekį, nes kai kurie siuntėjai gali siųsti daugiau dokumentų.
-- Pabrėžk, kur problema yra apimtyje, o kur – kokybėje.
-
-Prašau:
-1. Įvertinti mėnesines tendencijas
-2. Nustatyti, kur koncentruojasi daugiausia klaidų
-3. Įvertinti, kurie siuntėjai siunčia daugiausia klaidų absoliučiai
-4. Įvertinti, kurie siuntėjai turi didžiausią klaidų procentą
-5. Įvertinti, ar matomas Pareto principas
-6. Išskirti didžiausią problemą procese
-7. Pateikti aiškias rekomendacijas, kaip sumažinti klaidas
-8. Pabrėžti, ar problema labiau susijusi su šaltiniu, procesu ar duomenų kokybe
-
-Mėnesių suvestinė:
-{summary_md}
-
-Klaidos pagal priežastį:
-{priezastys_md}
-
-Siuntėjų analizė:
-{siuntejai_md}
-
-Užsakovų analizė:
-{uzsakovai_md}
-"""
-
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Tu esi patyręs verslo ir procesų analitikas."},
-                {"role": "user", "content": analysis_prompt}
-            ],
-            temperature=0.4
-        )
-
-        st.markdown(response.choices[0].message.content)
-
-    except Exception as e:
-        st.warning("Nepavyko gauti AI analizės. Patikrink API raktą Streamlit `secrets` nustatymuose.")
-        st.error(str(e))
-
+    if matavimai.enabled:
+        with st.sidebar.expander("🛠️ Našumo matavimai", expanded=True):
+            st.dataframe(pd.DataFrame(matavimai.records), use_container_width=True, hide_index=True)
+            st.caption(
+                "Laikas sekundėmis; RSS – viso serverio proceso (visų sesijų) atmintis po etapo ir jos "
+                "pokytis per etapą (MB). Tai ne etapo pikas: atmintis, atlaisvinta iki etapo pabaigos, nematoma."
+            )
+            st.caption(
+                f"Duomenys: {estimate_size(df) / 1024 ** 2:.1f} MB. "
+                f"Šios sesijos rezultatai podėlyje: {rezultatu_podelis.session_size(sesija) / 1024 ** 2:.1f} "
+                f"iš {SESIJOS_PODELIO_MB} MB, visų sesijų: {rezultatu_podelis.size / 1024 ** 2:.1f} iš {REZULTATU_PODELIO_MB} MB."
+            )
@@ -0,0 +1,66 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# Matavimai įjungiami visiems (KLAIDU_MATAVIMAI=1) arba vienai sesijai per ?debug=1
+MATAVIMAI_IJUNGTI = os.environ.get("KLAIDU_MATAVIMAI") == "1"
+
+logger = logging.getLogger("klaidu_analize.matavimai")
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def current_rss_mb():
+    # Dabartinė viso serverio proceso atmintis (RSS), bendra visoms sesijoms.
+    # Skaitoma iš /proc, todėl matuojama tik Linux sistemoje.
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StageTimer:
+    # Etapų trukmė, apdorotų eilučių skaičius ir proceso atminties (RSS) pokytis per etapą.
+    # Išjungus stage() grąžina tuščią kontekstą, todėl papildomų sąnaudų beveik nėra.
+    def __init__(self, enabled=MATAVIMAI_IJUNGTI, context=None):
+        self.enabled = enabled
+        self.context = context or {}
+        self.records = []
+
+    def stage(self, name, rows=None):
+        if not self.enabled:
+            return nullcontext({})
+        return self._measure(name, rows)
+
+    @contextmanager
+    def _measure(self, name, rows):
+        info = {"eilutes": rows}
+        rss_before = current_rss_mb()
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            self.record(name, time.perf_counter() - start, info["eilutes"], rss_before)
+
+    def record(self, name, seconds, rows=None, rss_before=None):
+        if not self.enabled:
+            return
+        rss = current_rss_mb()
+        irasas = {
+            "etapas": name,
+            "s": round(seconds, 4),
+            "eilutes": rows,
+            "rss_po_mb": round(rss, 1) if rss is not None else None,
+            "rss_pokytis_mb": round(rss - rss_before, 1) if rss is not None and rss_before is not None else None,
+        }
+        self.records.append(irasas)
+        # Viena JSON eilutė kiekvienam etapui – patogu rinkti iš žurnalų
+        logger.info(json.dumps({**self.context, **irasas}, ensure_ascii=False))
@@ -0,0 +1,73 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+PAIESKOS_STULPELIAI = ["Klaidos", "Klaidos_priežastis", "Siuntėjas", "Užsakovas"]
+
+ZODZIO_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return ZODZIO_RE.findall(str(text).casefold())
+
+
+class ErrorIndex:
+    # Žetonų indeksas klaidų sąrašo paieškai. Indeksuojamos ne eilutės, o kategorijų
+    # reikšmės: žetonas -> kategorijų kodai kiekviename stulpelyje. Paieška sudaro
+    # paieškos lenteles pagal kodus, todėl tinka bet kuriai to paties failo eilučių
+    # daliai (pvz., pagal filtrus) ir trunka milisekundes net milijonui eilučių.
+    # Indeksas sudaromas tik per pirmą paiešką.
+    def __init__(self, klaidos, columns=PAIESKOS_STULPELIAI):
+        self.categories = {col: klaidos[col].cat.categories for col in columns}
+        self.vocabulary = None
+        self.postings = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        postings = defaultdict(lambda: defaultdict(list))
+        for col, categories in self.categories.items():
+            for code, value in enumerate(categories):
+                for token in set(tokenize(value)):
+                    postings[token][col].append(code)
+        self.postings = {
+            token: {col: np.array(codes) for col, codes in cols.items()}
+            for token, cols in postings.items()
+        }
+        self.vocabulary = sorted(self.postings)
+
+    def _ensure_built(self):
+        if self.vocabulary is None:
+            with self._lock:
+                if self.vocabulary is None:
+                    self._build()
+
+    def term_lookups(self, term):
+        # Žodžio pradžia: "neteis" randa "neteisinga", "neteisingas" ir t. t.
+        lo = bisect.bisect_left(self.vocabulary, term)
+        hi = bisect.bisect_left(self.vocabulary, term + "\uffff")
+        lookups = {col: np.zeros(len(categories) + 1, dtype=bool) for col, categories in self.categories.items()}
+        for token in self.vocabulary[lo:hi]:
+            for col, codes in self.postings[token].items():
+                lookups[col][codes] = True
+        return lookups
+
+    def match(self, klaidos, query):
+        # Grąžina eilučių kaukę; eilutė tinka, jei kiekvienas užklausos žodis
+        # randamas bent viename paieškos stulpelyje. Tuščia užklausa – None.
+        terms = tokenize(query)
+        if not terms:
+            return None
+        self._ensure_built()
+
+        codes = {col: klaidos[col].cat.codes.to_numpy() for col in self.categories}
+        mask = np.ones(len(klaidos), dtype=bool)
+        for term in terms:
+            term_mask = np.zeros(len(klaidos), dtype=bool)
+            for col, lookup in self.term_lookups(term).items():
+                # Kodas -1 (tuščia reikšmė) patenka į paskutinį False
+                term_mask |= lookup[codes[col]]
+            mask &= term_mask
+        return mask
@@ -0,0 +1,215 @@
+# Ta pati analizė Polars varikliu: paruošimas, kubas ir agregavimas vykdomi
+# daugiagijėmis Polars užklausomis, o į pandas verčiamos tik rodomos lentelės.
+# Failai skaitomi tuo pačiu duomenys.read_workbook, kad reikšmės sutaptų.
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from analize import KLAIDU_SARASO_STULPELIAI, KUBO_MATAVIMAI, REZULTATU_GRUPES, filter_mask
+from duomenys import MENESIO_RE, MENESIU_TVARKA, METU_RE, canonical_labels, invoice_text, month_order, read_workbook
+from paieska import ErrorIndex
+
+SASKAITA = "Sąskaitos faktūros Nr."
+TEKSTO_STULPELIAI = ["Siuntėjas", "Užsakovas", "Klaidos_priežastis", "Klaidos"]
+# Teksto stulpelių tipas, kurį pandas suteikia pats: pandas 3 – str, pandas 2 – object
+PANDAS_TEKSTAS = pd.Series([], dtype=str).dtype
+
+
+# ----------------------------
+# PARUOŠIMAS
+# ----------------------------
+def from_raw(raw):
+    # Ne tuščios tekstų ir kategorijų reikšmės paverčiamos tekstu, kaip duomenys.to_category
+    # ir clean_text, o sąskaitos numeris – tuo pačiu duomenys.invoice_text
+    return pl.from_pandas(raw.assign(
+        **{col: raw[col].where(raw[col].isna(), raw[col].astype(str)) for col in ["Klientas"] + TEKSTO_STULPELIAI},
+        **{SASKAITA: invoice_text(raw[SASKAITA])}
+    )).cast(pl.String)
+
+
+def parse_workbook(file_bytes):
+    # Vykdoma darbiniame procese, kaip duomenys.parse_workbook
+    return from_raw(read_workbook(file_bytes))
+
+
+def clean_data(lf):
+    menesiai = {menuo.upper(): menuo for menuo in MENESIU_TVARKA}
+    stripped = {col: pl.col(col).str.strip_chars() for col in ["Klaidos_priežastis", "Klaidos"]}
+    return lf.with_columns(
+        **{col: pl.when(expr != "").then(expr) for col, expr in stripped.items()},
+        Mėnuo=pl.col("Klientas").str.to_uppercase().str.extract(MENESIO_RE.pattern, 1)
+        .replace_strict(menesiai, default="Nežinoma", return_dtype=pl.String)
+        .fill_null("Nežinoma"),
+        Metai=pl.col("Klientas").str.extract_all(METU_RE.pattern).list.last()
+    ).with_columns(
+        pl.col("Klaidos").is_not_null().alias("Yra klaida")
+    ).drop("Klientas")
+
+
+def canonical_text(df, col):
+    # Unikalios reikšmės ir jų kiekiai pirmo pasirodymo tvarka, kaip pd.factorize
+    counts = df.lazy().filter(pl.col(col).is_not_null()).group_by(col, maintain_order=True).len().collect()
+    if counts.is_empty():
+        return pl.col(col)
+    uniques = counts[col].to_list()
+    labels = canonical_labels(uniques, counts["len"].to_numpy()).tolist()
+    return pl.col(col).replace_strict(uniques, labels, default=None, return_dtype=pl.String)
+
+
+def encode_categories(df):
+    # Enum stulpeliai: ta pati kategorijų tvarka kaip duomenys.encode_categories
+    df = df.with_columns(canonical_text(df, "Klaidos_priežastis"))
+    menesiai = sorted(df["Mėnuo"].unique().to_list(), key=month_order)
+    return df.with_columns(
+        pl.col("Mėnuo").cast(pl.Enum(menesiai)),
+        *[
+            pl.col(col).cast(pl.Enum(sorted(df[col].drop_nulls().unique().to_list())))
+            for col in ["Metai"] + TEKSTO_STULPELIAI
+        ]
+    )
+
+
+def load_workbooks(files, executor=None):
+    # Ta pati sąsaja kaip duomenys.load_workbooks: (duomenys, pašalintų eilučių skaičius)
+    if executor is None or len(files) == 1:
+        parsed = [parse_workbook(file_bytes) for _, file_bytes in files]
+    else:
+        futures = [executor.submit(parse_workbook, file_bytes) for _, file_bytes in files]
+        parsed = []
+        for (name, _), future in zip(files, futures):
+            try:
+                parsed.append(future.result())
+            except ValueError as e:
+                for other in futures:
+                    other.cancel()
+                raise ValueError(f"{name}: {e}") from e
+
+    lf = pl.concat([
+        part.lazy().with_columns(Failas=pl.lit(i, dtype=pl.UInt32)) for i, part in enumerate(parsed)
+    ])
+    lf = clean_data(lf)
+    removed = 0
+    if len(parsed) > 1:
+        # Ta pati sąskaita paliekama tik iš pirmojo failo, kuriame ji yra
+        keep = pl.col(SASKAITA).is_null() | (pl.col("Failas") == pl.col("Failas").min().over(SASKAITA))
+        lf = lf.with_columns(keep.alias("Palikti"))
+        df = lf.collect()
+        removed = int((~df["Palikti"]).sum())
+        df = df.filter("Palikti").drop("Palikti")
+    else:
+        df = lf.collect()
+    return encode_categories(df.drop("Failas")), removed
+
+
+def from_pandas(df):
+    # Istorija saugoma pandas formatu; kategorijos virsta Enum su ta pačia tvarka
+    return pl.from_pandas(df).with_columns(
+        pl.col(col).cast(pl.String).cast(pl.Enum(df[col].cat.categories.tolist()))
+        for col in df.select_dtypes("category")
+    )
+
+
+def default_filters(df):
+    return tuple(df[col].dtype.categories.to_list() for col in ["Mėnuo", "Siuntėjas", "Užsakovas"])
+
+
+# ----------------------------
+# KUBAS IR AGREGAVIMAS
+# ----------------------------
+def build_cube(df):
+    rows = df.lazy().with_row_index("Eilutė")
+    cells = rows.group_by(KUBO_MATAVIMAI).agg(
+        Dokumentai=pl.col(SASKAITA).is_not_null().sum().cast(pl.Int64),
+        Eilutės=pl.len().cast(pl.Int64),
+        Pirma_eilutė=pl.col("Eilutė").min()
+    ).with_columns(
+        Su_klaidomis=pl.when(pl.col("Yra klaida")).then(pl.col("Eilutės")).otherwise(0)
+    )
+    # (langelis, sąskaita) poros unikalioms sąskaitoms skaičiuoti
+    pairs = rows.filter(pl.col(SASKAITA).is_not_null()).select(KUBO_MATAVIMAI + [SASKAITA]).unique()
+    cells, pairs = pl.collect_all([cells, pairs])
+
+    klaidos = df.filter(pl.col("Yra klaida")).select(KLAIDU_SARASO_STULPELIAI).to_pandas()
+    return {
+        "langeliai": cells,
+        "poros": pairs,
+        "klaidos": klaidos,
+        "klaidu_indeksas": ErrorIndex(klaidos)
+    }
+
+
+def selection(menesiai, siuntejai, uzsakovai, tik_klaidos=False):
+    expr = (
+        pl.col("Mėnuo").cast(pl.String).is_in(list(menesiai)) &
+        pl.col("Siuntėjas").cast(pl.String).is_in(list(siuntejai)) &
+        pl.col("Užsakovas").cast(pl.String).is_in(list(uzsakovai))
+    )
+    return expr & pl.col("Yra klaida") if tik_klaidos else expr
+
+
+def entity_stats(selected, col):
+    return selected.filter(pl.col(col).is_not_null()).group_by(col).agg(
+        Dokumentų_skaičius=pl.col("Dokumentai").sum(),
+        Klaidų_skaičius=pl.col("Su_klaidomis").sum()
+    ).sort(col).select(
+        pl.col(col).cast(pl.String), "Dokumentų_skaičius", pl.col("Klaidų_skaičius").alias("Klaidų skaičius")
+    )
+
+
+def aggregate_cube(cube, menesiai, siuntejai, uzsakovai, tik_klaidos=False, grupes=tuple(REZULTATU_GRUPES)):
+    # Ta pati sąsaja ir tie patys rezultatai kaip analize.aggregate_cube
+    where = selection(menesiai, siuntejai, uzsakovai, tik_klaidos)
+    selected = cube["langeliai"].lazy().filter(where)
+    pairs = cube["poros"].lazy().filter(where)
+
+    summary = selected.group_by("Mėnuo").agg(Su_klaidomis=pl.col("Su_klaidomis").sum()).join(
+        pairs.group_by("Mėnuo").agg(Sąskaitų_skaičius=pl.col(SASKAITA).n_unique().cast(pl.Int64)),
+        on="Mėnuo", how="left"
+    ).sort("Mėnuo").select(
+        pl.col("Mėnuo").cast(pl.String), pl.col("Sąskaitų_skaičius").fill_null(0), "Su_klaidomis"
+    )
+
+    # Skilčių lentelės – tik nurodytoms grupėms; visos surenkamos vienu collect_all
+    grupiu_uzklausos = {}
+    # Lygūs kiekiai rikiuojami pagal pirmą pasirodymą, kaip value_counts
+    if "priezastys" in grupes:
+        grupiu_uzklausos["priezastys"] = selected.filter(pl.col("Su_klaidomis") > 0).group_by(
+            pl.col("Klaidos_priežastis").cast(pl.String).fill_null("Nenurodyta")
+        ).agg(
+            Kiekis=pl.col("Su_klaidomis").sum(), Pirma=pl.col("Pirma_eilutė").min()
+        ).sort(["Kiekis", "Pirma"], descending=[True, False]).select(
+            pl.col("Klaidos_priežastis").alias("Klaidos priežastis"), pl.col("Kiekis").alias("Klaidų skaičius")
+        )
+
+    totals = selected.select(viso_klaidu=pl.col("Su_klaidomis").sum()).join(
+        pairs.select(viso_dokumentu=pl.col(SASKAITA).n_unique()), how="cross"
+    )
+
+    if "siuntejai" in grupes:
+        grupiu_uzklausos["siuntejai"] = entity_stats(selected, "Siuntėjas")
+    if "uzsakovai" in grupes:
+        grupiu_uzklausos["uzsakovai"] = entity_stats(selected, "Užsakovas")
+
+    summary, totals, *grupiu_lenteles = pl.collect_all([summary, totals, *grupiu_uzklausos.values()])
+
+    klaidos = cube["klaidos"]
+    klaidu_mask = filter_mask(klaidos, menesiai, siuntejai, uzsakovai)
+    if not klaidu_mask.all():
+        klaidos = klaidos[klaidu_mask]
+
+    return {
+        "summary": to_pandas(summary),
+        "klaidos": klaidos,
+        "klaidu_indeksas": cube["klaidu_indeksas"],
+        **{grupe: to_pandas(lentele) for grupe, lentele in zip(grupiu_uzklausos, grupiu_lenteles)},
+        "viso_dokumentu": int(totals["viso_dokumentu"][0]),
+        "viso_klaidu": int(totals["viso_klaidu"][0] or 0)
+    }
+
+
+def to_pandas(df):
+    # Rodymo riba: tekstas ir skaičiai tų pačių tipų kaip pandas variklyje (ir tuščiose lentelėse)
+    return pd.DataFrame({
+        col: df[col].to_numpy().astype(np.int64) if df[col].dtype.is_integer() else pd.Series(df[col].to_list(), dtype=PANDAS_TEKSTAS)
+        for col in df.columns
+    })